@@ -0,0 +1,235 @@
+# Bootstrap Confidence Intervals - uncertainty for every summary statistic
+# =========================================================================
+# The W5D1 analyses (e.g. Breakouts/answer1.py comparing mean and median per
+# city) report single numbers with no sense of how much they could move with
+# a different week of data. The bootstrap answers that by resampling the
+# data with replacement many times and looking at the spread of the
+# statistic across the resamples.
+#
+# The slow way is a Python loop of rng.choice + np.mean per resample. Here:
+#   - each batch draws ONE rng.integers index matrix (resamples x n),
+#   - the statistic runs over the whole (resamples x n) matrix at once
+#     (np.mean(axis=1), np.median(axis=1), ...),
+#   - the batch size comes from a memory cap, and batches can be spread over
+#     a process pool, each with its own independent random stream.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Statistics that work on a (resamples x n) matrix, one result per row
+STATISTICS = {
+    'mean': lambda samples: samples.mean(axis=1),
+    'median': lambda samples: np.median(samples, axis=1),
+    'std': lambda samples: samples.std(axis=1, ddof=1),
+    'var': lambda samples: samples.var(axis=1, ddof=1),
+    'iqr': lambda samples: np.subtract(*np.percentile(samples, [75, 25], axis=1)),
+}
+
+
+def batch_size_for(n, memory_mb=256, itemsize=8):
+    """How many resamples fit in memory_mb (index matrix + resampled values)"""
+    bytes_per_resample = n * (8 + itemsize)  # int64 indices + values
+    return max(1, int(memory_mb * 1024 * 1024 // bytes_per_resample))
+
+
+def _seed_sequence(seed):
+    """Accept None, an int, or an existing SeedSequence"""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def _sorted_quantile(sorted_values, sorted_idx, q):
+    """Quantile of each resample, read from row-sorted indices
+
+    When the data are sorted, sorting a resample's indices sorts its values
+    too, so order statistics only need an integer sort (much faster than
+    np.median / np.percentile on the gathered floats).
+    """
+    n = sorted_idx.shape[1]
+    position = q * (n - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, n - 1)
+    low_vals = sorted_values[sorted_idx[:, lower]]
+    high_vals = sorted_values[sorted_idx[:, upper]]
+    return low_vals + (high_vals - low_vals) * (position - lower)
+
+
+# Quantile-based statistics computed from sorted indices (see above)
+ORDER_STATISTICS = {
+    'median': lambda v, idx: _sorted_quantile(v, idx, 0.5),
+    'iqr': lambda v, idx: _sorted_quantile(v, idx, 0.75) - _sorted_quantile(v, idx, 0.25),
+}
+
+
+def _resample_batch(values, statistic, n_resamples, seed):
+    """Run one batch of resamples with a single index matrix
+
+    values must already be sorted when statistic is in ORDER_STATISTICS.
+    """
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(values), size=(n_resamples, len(values)))
+    if isinstance(statistic, str) and statistic in ORDER_STATISTICS:
+        idx.sort(axis=1)
+        return ORDER_STATISTICS[statistic](values, idx)
+    func = STATISTICS[statistic] if isinstance(statistic, str) else statistic
+    return func(values[idx])
+
+
+def bootstrap_distribution(values, statistic='mean', n_resamples=10_000,
+                           seed=None, memory_mb=256, workers=1):
+    """Bootstrap replicates of a statistic
+
+    Args:
+        values: 1D data (NaN values are dropped)
+        statistic: Name from STATISTICS, or a function taking a
+                   (resamples x n) array and returning one value per row.
+                   Use a module-level function when workers > 1.
+        n_resamples: Total number of bootstrap resamples
+        seed: int or SeedSequence for reproducible results (same seed and
+              batch size give the same answer with any number of workers)
+        memory_mb: Cap on the memory one batch may use; sets the batch size
+        workers: Number of processes (1 runs everything in this process)
+
+    Returns:
+        1D array of n_resamples bootstrap replicates
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        raise ValueError("Cannot bootstrap an empty sample")
+    if isinstance(statistic, str) and statistic in ORDER_STATISTICS:
+        values = np.sort(values)
+
+    per_batch = min(n_resamples, batch_size_for(values.size, memory_mb))
+    sizes = [per_batch] * (n_resamples // per_batch)
+    if n_resamples % per_batch:
+        sizes.append(n_resamples % per_batch)
+
+    # Independent random streams per batch, so results don't depend on
+    # which process runs which batch
+    seeds = _seed_sequence(seed).spawn(len(sizes))
+
+    if workers == 1 or len(sizes) == 1:
+        parts = [_resample_batch(values, statistic, size, s) for size, s in zip(sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_resample_batch, [values] * len(sizes),
+                                  [statistic] * len(sizes), sizes, seeds))
+    return np.concatenate(parts)
+
+
+def bootstrap_ci(values, statistic='mean', confidence=0.95, n_resamples=10_000,
+                 seed=None, memory_mb=256, workers=1):
+    """Percentile bootstrap confidence interval
+
+    Returns:
+        Dictionary with the statistic on the original data, the lower and
+        upper bounds, and the bootstrap standard error
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    replicates = bootstrap_distribution(values, statistic, n_resamples,
+                                        seed, memory_mb, workers)
+    alpha = (1 - confidence) / 2
+    lower, upper = np.quantile(replicates, [alpha, 1 - alpha])
+    func = STATISTICS[statistic] if isinstance(statistic, str) else statistic
+    return {
+        'estimate': float(func(values[None, :])[0]),
+        'lower': float(lower),
+        'upper': float(upper),
+        'std_error': float(replicates.std(ddof=1)),
+    }
+
+
+def _ci_job(job):
+    """One (group, statistic) interval, run inside a worker process"""
+    values, statistic, confidence, n_resamples, seed, memory_mb = job
+    return bootstrap_ci(values, statistic, confidence, n_resamples, seed, memory_mb, workers=1)
+
+
+def grouped_bootstrap_ci(data, statistics=('mean', 'median'), confidence=0.95,
+                         n_resamples=10_000, seed=None, memory_mb=256, workers=None):
+    """Confidence intervals for several statistics for every group
+
+    Args:
+        data: {group: values} dictionary (like city_temps) or a DataFrame
+              whose columns are the groups
+        statistics: Statistic names or functions (see bootstrap_distribution)
+        workers: Processes to use across groups (default: all CPU cores)
+
+    Returns:
+        DataFrame indexed by (group, statistic) with the columns from
+        bootstrap_ci. Each group resamples within its own batches, and the
+        groups run in parallel.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = {column: data[column].to_numpy() for column in data.columns}
+    workers = workers or os.cpu_count() or 1
+
+    labels, jobs = [], []
+    group_seeds = _seed_sequence(seed).spawn(len(data))
+    for (group, values), group_seed in zip(data.items(), group_seeds):
+        for statistic, stat_seed in zip(statistics, group_seed.spawn(len(statistics))):
+            labels.append((group, statistic if isinstance(statistic, str) else statistic.__name__))
+            jobs.append((values, statistic, confidence, n_resamples, stat_seed, memory_mb))
+
+    if workers == 1:
+        results = [_ci_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_ci_job, jobs))
+
+    index = pd.MultiIndex.from_tuples(labels, names=['group', 'statistic'])
+    return pd.DataFrame(results, index=index)
+
+
+def main():
+    """City confidence intervals, then loop vs. vectorized timing"""
+    import time
+
+    city_temps = {
+        'Phoenix': [28.5, 29.2, 30.1, 31.5, 42.8, 29.8, 30.2],
+        'Seattle': [12.3, 13.1, 12.9, 13.2, 12.8, 11.9, 13.0],
+        'Miami': [26.5, 26.8, 27.2, 45.1, 26.9, 27.3, 26.5],
+        'Chicago': [18.2, 3.5, 16.8, 17.2, 16.5, 17.9, 18.1],
+        'Denver': [15.6, 16.2, 2.3, 14.8, 15.9, 16.3, -3.7]
+    }
+
+    print("--- 95% bootstrap intervals for each city ---")
+    table = grouped_bootstrap_ci(city_temps, statistics=('mean', 'median'), seed=42)
+    print(table.round(2))
+
+    rng = np.random.default_rng(0)
+    daily = rng.normal(15, 8, 3650)  # ten years of daily temperatures
+    n_resamples = 10_000
+    workers = os.cpu_count()
+
+    for statistic, func in (('mean', np.mean), ('median', np.median)):
+        start = time.perf_counter()
+        loop = [func(rng.choice(daily, size=daily.size)) for _ in range(n_resamples)]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = bootstrap_distribution(daily, statistic, n_resamples, seed=1, memory_mb=64)
+        fast_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel = bootstrap_distribution(daily, statistic, n_resamples, seed=1,
+                                          memory_mb=64, workers=workers)
+        parallel_time = time.perf_counter() - start
+
+        print(f"\n--- {n_resamples:,} {statistic} resamples of {daily.size:,} values ---")
+        print(f"Python loop:                  {loop_time:.2f}s")
+        print(f"Batched index matrix:         {fast_time:.2f}s")
+        print(f"Batched, {workers} process(es):      {parallel_time:.2f}s")
+        print(f"Same replicates with 1 or {workers} process(es): {np.array_equal(fast, parallel)}")
+        print(f"Loop and batched standard errors agree: "
+              f"{np.isclose(np.std(loop), np.std(fast), rtol=0.1)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# Empirical Rule Coverage - how much data falls within k standard deviations
+# ==========================================================================
+# standard_deviation.py counts the values within 1, 2 and 3 SD with a Python
+# generator per band, and draws 1000 random normal values to compare
+# against. Neither is needed:
+#   - One pass turns every value into |z| = |x - mean| / std, and
+#     np.searchsorted puts each |z| into a band. One np.bincount then counts
+#     every band (for every group) at once, for any list of k.
+#   - The share a normal distribution puts within k SD is exact:
+#     P(|Z| <= k) = 2 * Phi(k) - 1, so no sampling is required.
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def normal_coverage(ks):
+    """Exact fraction of a normal distribution within k SD of the mean"""
+    ks = np.asarray(ks, dtype=np.float64)
+    return 2 * stats.norm.cdf(ks) - 1
+
+
+def sigma_coverage(values, ks=(1, 2, 3), groups=None, ddof=1):
+    """Observed vs normal coverage of mean ± k·SD bands
+
+    Args:
+        values: The measurements (NaN values are ignored)
+        ks: Any number of band widths in standard deviations
+        groups: Optional group label for each value; each group then uses
+                its own mean and standard deviation
+        ddof: 1 for the sample standard deviation (as in
+              standard_deviation.py), 0 for the population one
+
+    Returns:
+        DataFrame indexed by k (or by group and k) with columns
+        'Mean', 'SD', 'Lower', 'Upper', 'Count', 'Total', 'Observed (%)',
+        'Expected (%)' and 'Difference (pp)'. The bands include their
+        end points, like mean - sd <= x <= mean + sd.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    ks = np.sort(np.atleast_1d(np.asarray(ks, dtype=np.float64)))
+    n_k = len(ks)
+
+    if groups is None:
+        codes = np.zeros(len(values), dtype=np.int64)
+        labels = None
+    else:
+        codes, labels = pd.factorize(np.asarray(groups), sort=False)
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+    n_groups = 1 if labels is None else len(labels)
+
+    # Mean and standard deviation for each group
+    totals = np.bincount(codes, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.bincount(codes, weights=values, minlength=n_groups) / totals
+        deviations = values - means[codes]
+        m2 = np.bincount(codes, weights=deviations * deviations, minlength=n_groups)
+        sds = np.sqrt(m2 / (totals - ddof))
+        # A value equal to the mean is inside every band, even when SD is 0
+        abs_z = np.where(deviations == 0, 0.0, np.abs(deviations) / sds[codes])
+
+    # band[i] = how many k are smaller than |z|, so the value is inside every
+    # band from that one up. Counting bands and accumulating gives coverage.
+    band = np.searchsorted(ks, abs_z, side='left')
+    table = np.bincount(codes * (n_k + 1) + band, minlength=n_groups * (n_k + 1))
+    within = np.cumsum(table.reshape(n_groups, n_k + 1), axis=1)[:, :n_k]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        observed = within / totals[:, None] * 100
+    expected = normal_coverage(ks) * 100
+
+    result = pd.DataFrame({
+        'Mean': np.repeat(means, n_k),
+        'SD': np.repeat(sds, n_k),
+        'Lower': (means[:, None] - ks * sds[:, None]).ravel(),
+        'Upper': (means[:, None] + ks * sds[:, None]).ravel(),
+        'Count': within.ravel(),
+        'Total': np.repeat(totals, n_k),
+        'Observed (%)': observed.ravel(),
+        'Expected (%)': np.tile(expected, n_groups),
+    })
+    result['Difference (pp)'] = result['Observed (%)'] - result['Expected (%)']
+
+    if labels is None:
+        result.index = pd.Index(ks, name='k')
+    else:
+        result.index = pd.MultiIndex.from_product(
+            [labels, ks], names=[getattr(groups, 'name', None) or 'group', 'k'])
+    return result
+
+
+def main():
+    """Empirical rule for the weekly temperatures and for many stations"""
+    import time
+
+    temperatures = [22.5, 23.1, 24.0, 35.7, 21.8, 22.3, 23.5]
+    coverage = sigma_coverage(temperatures)
+    print("--- Weekly Temperatures ---")
+    print(coverage[['Lower', 'Upper', 'Count', 'Observed (%)', 'Expected (%)']].round(1))
+
+    mean, sd = np.mean(temperatures), np.std(temperatures, ddof=1)
+    loop_counts = [sum((mean - k * sd <= x <= mean + k * sd) for x in temperatures) for k in (1, 2, 3)]
+    print(f"Matches the generator counts: {list(coverage['Count']) == loop_counts}")
+
+    rng = np.random.default_rng(42)
+    n_rows, n_stations = 5_000_000, 1000
+    stations = rng.integers(0, n_stations, n_rows)
+    readings = rng.normal(15, 8, n_rows) + stations * 0.01
+
+    start = time.perf_counter()
+    per_station = sigma_coverage(readings, ks=[0.5, 1, 1.5, 2, 2.5, 3], groups=stations)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n--- {n_rows:,} readings, {n_stations:,} stations, 6 bands: {elapsed:.2f}s ---")
+    summary = per_station.groupby(level='k')[['Observed (%)', 'Expected (%)']].mean()
+    print(summary.round(2))
+
+
+if __name__ == "__main__":
+    main()
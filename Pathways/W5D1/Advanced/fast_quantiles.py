@@ -0,0 +1,466 @@
+# Fast Quantiles - selection-based median, IQR and percentiles
+# =============================================================
+# calculate_median in median_temperature.py sorts the whole list on every
+# call, and the IQR code calls np.percentile twice (each call does its own
+# selection pass). A median only needs the middle value or two, not a fully
+# sorted list, so np.partition (introselect, O(n) on average) is enough.
+#
+# This module provides three ways to get quantiles:
+#   1. quantiles()           - exact, any number of quantiles in one partition
+#   2. RunningMedian         - exact median over a sliding window (two heaps)
+#   3. HistogramQuantiles /
+#      P2Quantile            - approximate, fixed memory, for data streams
+
+import heapq
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+
+# =============================================================================
+# 1. EXACT QUANTILES WITH ONE PARTITION
+# =============================================================================
+
+def quantiles(values, qs, axis=-1):
+    """Exact quantiles from one selection pass instead of a full sort
+
+    Matches np.percentile / np.quantile with the default 'linear' method.
+
+    Args:
+        values: 1D list/array, or 2D array (one series per row with axis=-1)
+        qs: Quantile or list of quantiles between 0 and 1 (e.g. [0.25, 0.75])
+        axis: Axis along which to compute the quantiles
+
+    Returns:
+        Array of quantiles. For a list of qs the quantiles are on the first
+        axis, like np.quantile.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    q_arr = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+    if np.any((q_arr < 0) | (q_arr > 1)):
+        raise ValueError("Quantiles must be between 0 and 1")
+
+    values = np.moveaxis(values, axis, -1)
+    n = values.shape[-1]
+    if n == 0:
+        raise ValueError("Cannot compute quantiles of an empty array")
+
+    # Each quantile sits between two neighbouring order statistics
+    positions = q_arr * (n - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, n - 1)
+    fraction = positions - lower
+
+    # Put every needed order statistic in place without sorting
+    kth = np.unique(np.concatenate([lower, upper]))
+    if values.ndim == 1:
+        part = _select(values.copy(), kth)
+    else:
+        part = np.partition(values, kth, axis=-1)
+
+    low_vals = np.moveaxis(part[..., lower], -1, 0)
+    high_vals = np.moveaxis(part[..., upper], -1, 0)
+    fraction = fraction.reshape((-1,) + (1,) * (low_vals.ndim - 1))
+    result = low_vals + (high_vals - low_vals) * fraction
+
+    # NaN anywhere in a series makes its quantiles NaN, as in np.quantile
+    if np.isnan(values).any():
+        result = np.where(np.isnan(values).any(axis=-1), np.nan, result)
+
+    if np.ndim(qs) == 0:
+        return result[0]
+    return result
+
+
+def _select(values, kth):
+    """Partition a 1D array in place so that values[k] is in sorted position
+
+    np.partition accepts a list of kth, but with several of them it is much
+    slower than a single-kth partition. Partitioning at the middle kth first
+    and then recursing into each side with the remaining kth keeps every
+    step on the fast single-kth path and each step on a smaller slice.
+    """
+    stack = [(0, values.size, list(kth))]
+    while stack:
+        start, stop, ks = stack.pop()
+        if not ks:
+            continue
+        mid = len(ks) // 2
+        k = ks[mid]
+        values[start:stop].partition(k - start)
+        stack.append((start, k, ks[:mid]))
+        stack.append((k + 1, stop, ks[mid + 1:]))
+    return values
+
+
+def median(values, axis=-1):
+    """Exact median without sorting"""
+    return quantiles(values, 0.5, axis=axis)
+
+
+def iqr(values, axis=-1):
+    """Interquartile range (Q3 - Q1) from one partition
+
+    Returns:
+        Tuple of (q1, q3, iqr)
+    """
+    q1, q3 = quantiles(values, [0.25, 0.75], axis=axis)
+    return q1, q3, q3 - q1
+
+
+# =============================================================================
+# 2. SLIDING-WINDOW MEDIAN WITH TWO HEAPS
+# =============================================================================
+
+class RunningMedian:
+    """Median of the last `window` values, updated in O(log window) per value
+
+    The lower half of the window lives in a max-heap and the upper half in a
+    min-heap. Values leaving the window are deleted lazily: they are counted
+    in `_delayed` and only popped once they reach the top of a heap.
+
+    NaN values take up a place in the window but are never put in the heaps
+    (NaN never compares equal, so it could not be deleted again). The median
+    is of the valid values, and NaN while there are fewer than `min_periods`
+    of them, as in pandas rolling().
+    """
+
+    def __init__(self, window, min_periods=1):
+        if window < 1:
+            raise ValueError("Window must be at least 1")
+        if not 1 <= min_periods <= window:
+            raise ValueError("min_periods must be between 1 and the window")
+        self.window = window
+        self.min_periods = min_periods
+        self._values = deque()
+        self._low = []    # max-heap (stored negated)
+        self._high = []   # min-heap
+        self._low_size = 0
+        self._high_size = 0
+        self._delayed = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def push(self, x):
+        """Add a value, drop the oldest if the window is full, return median"""
+        x = float(x)
+        self._values.append(x)
+        if not math.isnan(x):
+            self._insert(x)
+        if len(self._values) > self.window:
+            oldest = self._values.popleft()
+            if not math.isnan(oldest):
+                self._erase(oldest)
+        return self.median()
+
+    def median(self):
+        """Current median of the window (NaN if under min_periods valid values)"""
+        if self._low_size + self._high_size < self.min_periods:
+            return float('nan')
+        if self._low_size > self._high_size:
+            return -self._low[0]
+        return (-self._low[0] + self._high[0]) / 2
+
+    def _insert(self, x):
+        if not self._low or x <= -self._low[0]:
+            heapq.heappush(self._low, -x)
+            self._low_size += 1
+        else:
+            heapq.heappush(self._high, x)
+            self._high_size += 1
+        self._rebalance()
+
+    def _erase(self, x):
+        self._delayed[x] = self._delayed.get(x, 0) + 1
+        if x <= -self._low[0]:
+            self._low_size -= 1
+            if x == -self._low[0]:
+                self._prune(self._low, -1)
+        else:
+            self._high_size -= 1
+            if self._high and x == self._high[0]:
+                self._prune(self._high, 1)
+        self._rebalance()
+
+    def _prune(self, heap, sign):
+        """Pop values at the top of a heap that have already left the window"""
+        while heap:
+            x = sign * heap[0]
+            count = self._delayed.get(x, 0)
+            if count == 0:
+                break
+            if count == 1:
+                del self._delayed[x]
+            else:
+                self._delayed[x] = count - 1
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        """Keep the lower half equal to, or one larger than, the upper half"""
+        if self._low_size > self._high_size + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, -1)
+        elif self._low_size < self._high_size:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._low_size += 1
+            self._high_size -= 1
+            self._prune(self._high, 1)
+
+
+def rolling_median(values, window, min_periods=None):
+    """Sliding-window median for a whole series
+
+    Same output as pd.Series(values).rolling(window, min_periods).median():
+    by default (min_periods=window) an entry is NaN unless its whole window
+    holds valid values, so the first window - 1 entries are NaN and a NaN
+    value blanks the next `window` entries.
+    """
+    tracker = RunningMedian(window, window if min_periods is None else min_periods)
+    result = np.empty(len(values))
+    for i, x in enumerate(values):
+        result[i] = tracker.push(x)
+    return result
+
+
+# =============================================================================
+# 3. APPROXIMATE QUANTILES FOR STREAMS
+# =============================================================================
+
+class HistogramQuantiles:
+    """Approximate quantiles from a fixed-width histogram
+
+    Works chunk by chunk with np.bincount, uses fixed memory, and two
+    sketches with the same bins can be merged. The error is at most one bin
+    width, so for temperatures in (-60, 60) with 12,000 bins it is 0.01°C.
+    Values outside [low, high) are counted in the first/last bin.
+    """
+
+    def __init__(self, low, high, bins=12_000):
+        self.low = float(low)
+        self.high = float(high)
+        self.bins = int(bins)
+        self.width = (self.high - self.low) / self.bins
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.count = 0
+
+    def update(self, values):
+        """Add a chunk of values (NaN values are skipped)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        idx = ((values - self.low) / self.width).astype(np.int64)
+        np.clip(idx, 0, self.bins - 1, out=idx)
+        self.counts += np.bincount(idx, minlength=self.bins)
+        self.count += values.size
+        return self
+
+    def merge(self, other):
+        """Add the counts of another sketch built with the same bins"""
+        if (self.low, self.high, self.bins) != (other.low, other.high, other.bins):
+            raise ValueError("Can only merge sketches with identical bins")
+        self.counts += other.counts
+        self.count += other.count
+        return self
+
+    def quantiles(self, qs):
+        """Estimate quantiles by interpolating inside the cumulative counts"""
+        if self.count == 0:
+            raise ValueError("No values have been added")
+        q_arr = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        cumulative = np.cumsum(self.counts)
+        targets = q_arr * self.count
+        idx = np.searchsorted(cumulative, targets, side='left')
+        idx = np.minimum(idx, self.bins - 1)
+        before = np.where(idx > 0, cumulative[idx - 1], 0)
+        in_bin = np.maximum(self.counts[idx], 1)
+        fraction = np.clip((targets - before) / in_bin, 0, 1)
+        result = self.low + (idx + fraction) * self.width
+        if np.ndim(qs) == 0:
+            return result[0]
+        return result
+
+
+class P2Quantile:
+    """The P² algorithm (Jain & Chlamtac, 1985) for a single quantile
+
+    Keeps only five markers, so memory is constant and no value range needs
+    to be known in advance. Values are added one at a time.
+    """
+
+    def __init__(self, q):
+        if not 0 < q < 1:
+            raise ValueError("Quantile must be strictly between 0 and 1")
+        self.q = q
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self._increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, x):
+        """Add one value"""
+        x = float(x)
+        self.count += 1
+        h = self._heights
+
+        if len(h) < 5:
+            h.append(x)
+            h.sort()
+            return self
+
+        # Find the cell the new value falls into, stretching the ends if needed
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= h[k + 1]:
+                k += 1
+
+        pos = self._positions
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Nudge the three middle markers toward their desired positions
+        for i in range(1, 4):
+            d = self._desired[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not h[i - 1] < candidate < h[i + 1]:
+                    candidate = h[i] + step * (h[i + step] - h[i]) / (pos[i + step] - pos[i])
+                h[i] = candidate
+                pos[i] += step
+        return self
+
+    def update(self, values):
+        """Add every value in an iterable"""
+        for x in values:
+            if not math.isnan(x):
+                self.add(x)
+        return self
+
+    def _parabolic(self, i, step):
+        h, n = self._heights, self._positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        """Current estimate of the quantile"""
+        if self.count == 0:
+            return float('nan')
+        if self.count < 5:
+            return float(np.quantile(self._heights, self.q))
+        return self._heights[2]
+
+
+# =============================================================================
+# DEMO AND BENCHMARK
+# =============================================================================
+
+def benchmark(n=10_000_000, seed=42):
+    """Time sorting, np.percentile and one partition on n temperatures"""
+    rng = np.random.default_rng(seed)
+    data = rng.normal(15, 10, n)
+    print(f"\n--- Benchmark: {n:,} values ---")
+
+    start = time.perf_counter()
+    np.sort(data)
+    sort_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    q1_np = np.percentile(data, 25)
+    q3_np = np.percentile(data, 75)
+    med_np = np.percentile(data, 50)
+    percentile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    q1, med, q3 = quantiles(data, [0.25, 0.5, 0.75])
+    partition_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sketch = HistogramQuantiles(-60, 90)
+    for chunk in np.array_split(data, 20):
+        sketch.update(chunk)
+    approx = sketch.quantiles([0.25, 0.5, 0.75])
+    sketch_time = time.perf_counter() - start
+
+    print(f"Full sort:                        {sort_time:.3f}s")
+    print(f"np.percentile x3:                 {percentile_time:.3f}s")
+    print(f"quantiles() one partition:        {partition_time:.3f}s")
+    print(f"HistogramQuantiles (20 chunks):   {sketch_time:.3f}s")
+    print(f"Partition matches np.percentile: {np.allclose([q1, med, q3], [q1_np, med_np, q3_np])}")
+    print(f"Sketch max error: {np.max(np.abs(approx - [q1, med, q3])):.4f}°C "
+          f"(bin width {sketch.width:.4f}°C)")
+
+    window = 365
+    sample = data[:200_000]
+    start = time.perf_counter()
+    rolled = rolling_median(sample, window)
+    rolling_time = time.perf_counter() - start
+    print(f"Rolling median, {len(sample):,} values, window {window}: {rolling_time:.3f}s")
+    return rolled
+
+
+def main():
+    """Check the exact and approximate modes against NumPy, then benchmark"""
+    import sys
+
+    import pandas as pd
+
+    temperatures = [22.5, 23.1, 24.0, 35.7, 21.8, 22.3, 23.5]
+    even_temps = [22.5, 23.1, 24.0, 21.8, 22.3, 23.5]
+
+    print("--- Exact Quantiles ---")
+    print(f"Median: {median(temperatures):.2f}°C "
+          f"(matches np.median: {np.isclose(median(temperatures), np.median(temperatures))})")
+    print(f"Even-length median: {median(even_temps):.2f}°C "
+          f"(matches np.median: {np.isclose(median(even_temps), np.median(even_temps))})")
+    q1, q3, spread = iqr(temperatures)
+    print(f"Q1: {q1:.2f}°C, Q3: {q3:.2f}°C, IQR: {spread:.2f}°C "
+          f"(matches np.percentile: {np.allclose([q1, q3], np.percentile(temperatures, [25, 75]))})")
+
+    rng = np.random.default_rng(0)
+    stations = rng.normal(15, 8, size=(50, 1001))
+    qs = [0.05, 0.25, 0.5, 0.75, 0.95]
+    print(f"50 stations at once matches np.quantile: "
+          f"{np.allclose(quantiles(stations, qs), np.quantile(stations, qs, axis=1))}")
+
+    print("\n--- Sliding-Window Median ---")
+    series = rng.integers(0, 30, 2000).astype(float)  # integers, so plenty of ties
+    expected = pd.Series(series).rolling(30).median().to_numpy()
+    print(f"Matches pandas rolling(30).median(): "
+          f"{np.allclose(rolling_median(series, 30), expected, equal_nan=True)}")
+    gappy = series.copy()
+    gappy[np.random.default_rng(1).random(len(gappy)) < 0.02] = np.nan  # missing readings
+    matches = all(np.allclose(rolling_median(gappy, 30, min_periods),
+                              pd.Series(gappy).rolling(30, min_periods=min_periods).median(),
+                              equal_nan=True) for min_periods in (None, 1, 20))
+    print(f"With missing values (min_periods 30, 1, 20) still matches: {matches}")
+
+    print("\n--- Approximate Stream Quantiles ---")
+    stream = rng.normal(15, 10, 200_000)
+    p2 = P2Quantile(0.5).update(stream)
+    print(f"P² median estimate: {p2.value():.3f}°C, exact: {np.median(stream):.3f}°C")
+    left = HistogramQuantiles(-60, 90).update(stream[:100_000])
+    right = HistogramQuantiles(-60, 90).update(stream[100_000:])
+    merged = left.merge(right).quantiles([0.25, 0.5, 0.75])
+    print(f"Merged histogram sketch Q1/median/Q3: {np.round(merged, 3)}")
+    print(f"Exact Q1/median/Q3:                   {np.round(np.quantile(stream, [0.25, 0.5, 0.75]), 3)}")
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    benchmark(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# Grouped Dispersion - every spread measure for every group in one pass
+# ======================================================================
+# Breakouts/answer2.py fills separate temp_range, temp_variance, temp_std,
+# temp_iqr (and precip_*) dictionaries by looping over the months and
+# calling max/min/np.var/np.std/np.percentile on each one. That is one
+# Python iteration and several full scans per group.
+#
+# dispersion_report() takes long-format data - one (group, value) pair per
+# row - sorts it once by (group, value), and then reads every statistic off
+# the sorted segments with NumPy:
+#   - count, sum and squared deviations come from np.bincount
+#   - min and max are the first and last value of each segment
+#   - quartiles are interpolated from positions inside each segment
+# The cost is one sort of all rows, no matter how many groups there are.
+
+import numpy as np
+import pandas as pd
+
+REPORT_COLUMNS = ['Count', 'Mean', 'Min', 'Q1', 'Median', 'Q3', 'Max',
+                  'Range', 'Variance', 'Standard Deviation', 'IQR', 'CV (%)']
+
+
+def to_long(wide):
+    """Turn {group: [values]} or a wide DataFrame into (groups, values) arrays
+
+    Example:
+        groups, values = to_long(monthly_temps)
+    """
+    if isinstance(wide, pd.DataFrame):
+        wide = {column: wide[column].to_numpy() for column in wide.columns}
+    groups = np.concatenate([np.repeat(np.array([key], dtype=object), len(vals))
+                             for key, vals in wide.items()])
+    values = np.concatenate([np.asarray(vals, dtype=np.float64) for vals in wide.values()])
+    return groups, values
+
+
+def dispersion_report(groups, values, ddof=1):
+    """Range, variance, std, IQR, CV and quartiles for every group
+
+    Args:
+        groups: Group label for each value (months, cities, station IDs...)
+        values: The measurements, same length as groups. NaN is ignored.
+        ddof: 1 for sample variance/std (as in answer2.py), 0 for population
+
+    Returns:
+        DataFrame with one row per group (in order of first appearance) and
+        the columns in REPORT_COLUMNS. Quartiles match np.percentile's
+        default 'linear' method. CV (%) is inf when the mean is zero.
+    """
+    group_name = getattr(groups, 'name', None)
+    values = np.asarray(values, dtype=np.float64)
+    codes, labels = pd.factorize(np.asarray(groups), sort=False)
+    if len(codes) != len(values):
+        raise ValueError("groups and values must have the same length")
+
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+    n_groups = len(labels)
+
+    # Sort by (group, value) so each group becomes a sorted segment.
+    # np.lexsort is slow on large inputs, so rank the values once and sort a
+    # single int64 key (group * n + rank) instead.
+    n = len(values)
+    ranks = np.empty(n, dtype=np.int64)
+    ranks[np.argsort(values)] = np.arange(n)
+    order = np.argsort(codes.astype(np.int64) * n + ranks)
+    codes, values = codes[order], values[order]
+
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    ends = starts + counts - 1
+    present = counts > 0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.bincount(codes, weights=values, minlength=n_groups) / counts
+        # Squared deviations from each group's own mean (numerically stable)
+        deviations = values - means[codes]
+        m2 = np.bincount(codes, weights=deviations * deviations, minlength=n_groups)
+        variance = np.where(counts > ddof, m2 / (counts - ddof), np.nan)
+        std = np.sqrt(variance)
+        cv = np.where(means != 0, std / means * 100, np.inf)
+
+    def segment_quantile(q):
+        if len(values) == 0:
+            return np.full(n_groups, np.nan)
+        last = len(values) - 1
+        position = starts + q * np.maximum(counts - 1, 0)
+        lower = np.minimum(np.floor(position).astype(np.int64), last)
+        upper = np.minimum(np.minimum(lower + 1, np.maximum(ends, lower)), last)
+        fraction = position - lower
+        result = values[lower] + (values[upper] - values[lower]) * fraction
+        return np.where(present, result, np.nan)
+
+    q1 = segment_quantile(0.25)
+    median = segment_quantile(0.5)
+    q3 = segment_quantile(0.75)
+    mins = segment_quantile(0.0)
+    maxs = segment_quantile(1.0)
+
+    report = pd.DataFrame({
+        'Count': counts,
+        'Mean': np.where(present, means, np.nan),
+        'Min': mins,
+        'Q1': q1,
+        'Median': median,
+        'Q3': q3,
+        'Max': maxs,
+        'Range': maxs - mins,
+        'Variance': variance,
+        'Standard Deviation': std,
+        'IQR': q3 - q1,
+        'CV (%)': np.where(present, cv, np.nan),
+    }, index=pd.Index(labels, name=group_name))
+    return report
+
+
+def dispersion_report_frame(df, group_col, value_col, ddof=1):
+    """Same as dispersion_report, taking column names of a long DataFrame"""
+    return dispersion_report(df[group_col], df[value_col].to_numpy(), ddof=ddof)
+
+
+def main():
+    """Check against the per-month loop in answer2.py, then scale up"""
+    import time
+
+    monthly_temps = {
+        'January': [2.3, 1.5, 0.8, -5.2, 3.1, -7.8, 2.9, 1.7, 0.5, -2.1,
+                    1.3, 2.5, 1.1, -0.9, 3.4, 2.2, 1.8, 0.3, -1.5, 4.2],
+        'July': [28.5, 29.1, 27.8, 30.2, 29.4, 31.5, 28.9, 29.7, 28.2, 29.9,
+                 36.8, 28.7, 29.5, 27.9, 30.3, 29.2, 28.1, 29.8, 37.5, 29.6],
+    }
+    report = dispersion_report(*to_long(monthly_temps))
+    print("--- Temperature Dispersion ---")
+    print(report.round(2))
+
+    july = monthly_temps['July']
+    q1, q3 = np.percentile(july, [25, 75])
+    print(f"\nJuly matches NumPy: "
+          f"{np.isclose(report.loc['July', 'Variance'], np.var(july, ddof=1))}, "
+          f"{np.isclose(report.loc['July', 'IQR'], q3 - q1)}")
+
+    rng = np.random.default_rng(42)
+    n_rows, n_groups = 10_000_000, 2_000_000
+    groups = rng.integers(0, n_groups, n_rows)
+    values = rng.normal(15, 8, n_rows)
+
+    start = time.perf_counter()
+    big = dispersion_report(groups, values)
+    elapsed = time.perf_counter() - start
+    print(f"\n{n_rows:,} rows in {len(big):,} groups: {elapsed:.2f}s")
+
+    sample = big.index[:3]
+    check = pd.DataFrame({'g': groups, 'v': values})
+    check = check[check['g'].isin(sample)].groupby('g')['v'].agg(['var', 'min', 'max'])
+    print(f"Spot check against pandas groupby: "
+          f"{np.allclose(big.loc[sample, ['Variance', 'Min', 'Max']].to_numpy(), check.loc[sample].to_numpy())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from streaming_moments import MomentAccumulator
 
 # Sample temperature data (°C) for a week
 temperatures = [22.5, 23.1, 24.0, 35.7, 21.8, 22.3, 23.5]
@@ -51,6 +52,15 @@ print(f"Manually calculated population variance: {manual_pop_variance:.2f}°C²"
 print(f"NumPy sample variance matches manual: {np.isclose(manual_sample_variance, sample_variance)}")
 print(f"NumPy population variance matches manual: {np.isclose(manual_pop_variance, population_variance)}")
 
+# The manual version walks the list twice (mean first, then squared differences).
+# MomentAccumulator (streaming_moments.py) gets the same answer in a single pass,
+# one value at a time, and can combine partial results from separate chunks.
+streaming = MomentAccumulator()
+for temp in temperatures:
+    streaming.add(temp)
+print(f"Single-pass sample variance: {streaming.variance(sample=True):.2f}°C²")
+print(f"Single-pass matches NumPy: {np.isclose(streaming.variance(sample=True), sample_variance)}")
+
 # Let's see what happens to the variance when we remove the outlier
 temps_without_outlier = [22.5, 23.1, 24.0, 21.8, 22.3, 23.5]  # Removed 35.7°C
 variance_without_outlier = np.var(temps_without_outlier, ddof=1)
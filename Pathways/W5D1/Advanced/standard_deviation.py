@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import scipy.stats as stats
+from empirical_rule import sigma_coverage
 
 # Sample temperature data (°C) for a week
 temperatures = [22.5, 23.1, 24.0, 35.7, 21.8, 22.3, 23.5]
@@ -56,16 +57,20 @@ print(f"  Mean ± 1 SD: {mean_temp - sample_std:.2f}°C to {mean_temp + sample_s
 print(f"  Mean ± 2 SD: {mean_temp - 2*sample_std:.2f}°C to {mean_temp + 2*sample_std:.2f}°C")
 print(f"  Mean ± 3 SD: {mean_temp - 3*sample_std:.2f}°C to {mean_temp + 3*sample_std:.2f}°C")
 
-# Count how many original temperatures fall within these ranges
-within_1sd = sum((mean_temp - sample_std <= x <= mean_temp + sample_std) for x in temperatures)
-within_2sd = sum((mean_temp - 2*sample_std <= x <= mean_temp + 2*sample_std) for x in temperatures)
-within_3sd = sum((mean_temp - 3*sample_std <= x <= mean_temp + 3*sample_std) for x in temperatures)
+# Count how many original temperatures fall within these ranges.
+# sigma_coverage checks every band in one vectorized pass and also gives the
+# exact share a normal distribution would have (no random sample needed).
+coverage = sigma_coverage(temperatures, ks=[1, 2, 3])
+within_1sd, within_2sd, within_3sd = coverage['Count']
 
 print(f"\nOf our {len(temperatures)} data points:")
 print(f"  {within_1sd} ({within_1sd/len(temperatures)*100:.1f}%) are within 1 SD of the mean")
 print(f"  {within_2sd} ({within_2sd/len(temperatures)*100:.1f}%) are within 2 SD of the mean")
 print(f"  {within_3sd} ({within_3sd/len(temperatures)*100:.1f}%) are within 3 SD of the mean")
 
+print("\nObserved vs. exact normal coverage:")
+print(coverage[['Observed (%)', 'Expected (%)', 'Difference (pp)']].round(1))
+
 # Visualize the standard deviation with histogram and normal curve
 plt.figure(figsize=(12, 6))
 
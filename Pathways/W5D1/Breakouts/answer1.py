@@ -1,11 +1,18 @@
 # Central Tendency Analysis - ANSWER KEY
 # ======================================
 
+import os
+import sys
+
 import numpy as np
 import pandas as pd
-from scipy import stats
 import matplotlib.pyplot as plt
 
+# fast_mode.py lives in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from fast_mode import mode
+from bootstrap_ci import grouped_bootstrap_ci
+
 # Temperature data for different cities (°C)
 city_temps = {
     'Phoenix': [28.5, 29.2, 30.1, 31.5, 42.8, 29.8, 30.2],
@@ -23,14 +30,15 @@ print(temps_df)
 # Calculate mean, median, and mode for each city
 city_means = {}
 city_medians = {}
-city_modes = {}
 
 for city, temps in city_temps.items():
     city_means[city] = np.mean(temps)
     city_medians[city] = np.median(temps)
-    mode_result = stats.mode(temps)
-    # city_modes[city] = mode_result.mode[0]
-    city_modes[city] = mode_result[0]
+
+# One call finds the mode of every city (each column of temps_df) and always
+# returns the same ModeResult, whatever scipy version is installed
+mode_result = mode(temps_df)
+city_modes = dict(zip(temps_df.columns, mode_result.mode))
 
 # Create a table to compare measures across cities
 comparison_df = pd.DataFrame({
@@ -54,6 +62,14 @@ diff_df['Mean-Median Difference'] = (diff_df['Mean'] - diff_df['Median']).round(
 print("\nDifference between mean and median:")
 print(diff_df.set_index('City'))
 
+# How much could the mean and median move with a different week of data?
+# 95% bootstrap confidence intervals (workers=1 keeps this script free of
+# process pools, which need an `if __name__ == "__main__":` guard on Windows)
+city_cis = grouped_bootstrap_ci(city_temps, statistics=('mean', 'median'),
+                                seed=42, workers=1)
+print("\n95% bootstrap confidence intervals (°C):")
+print(city_cis.round(1))
+
 # Create boxplots to visualize data distribution and outliers
 plt.figure(figsize=(12, 6))
 plt.boxplot(city_temps.values(), labels=city_temps.keys())
@@ -1,11 +1,18 @@
 # Dispersion Analysis - ANSWER KEY
 # ===============================
 
+import os
+import sys
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy import stats
 
+# grouped_dispersion.py lives in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from grouped_dispersion import dispersion_report, to_long
+
 # Sample monthly temperature data for a city (°C)
 monthly_temps = {
     'January': [2.3, 1.5, 0.8, -5.2, 3.1, -7.8, 2.9, 1.7, 0.5, -2.1, 
@@ -40,74 +47,31 @@ print(temp_df.head())
 print("\nPrecipitation data (first 5 rows):")
 print(precipitation_df.head())
 
-# Calculate basic dispersion measures for each month's temperature
-temp_range = {}
-temp_variance = {}
-temp_std = {}
-temp_iqr = {}
-
-for month in monthly_temps.keys():
-    temp_range[month] = max(monthly_temps[month]) - min(monthly_temps[month])
-    temp_variance[month] = np.var(monthly_temps[month], ddof=1)
-    temp_std[month] = np.std(monthly_temps[month], ddof=1)
-    q1 = np.percentile(monthly_temps[month], 25)
-    q3 = np.percentile(monthly_temps[month], 75)
-    temp_iqr[month] = q3 - q1
+# Calculate basic dispersion measures for each month's temperature.
+# dispersion_report sorts all (month, value) pairs once and computes every
+# measure for every month together, instead of one loop pass per month.
+temp_report = dispersion_report(*to_long(monthly_temps))
 
 # Create a summary table of all dispersion measures for temperature
-temp_dispersion = pd.DataFrame({
-    'Range': temp_range,
-    'Variance': temp_variance,
-    'Standard Deviation': temp_std,
-    'IQR': temp_iqr
-})
+temp_dispersion = temp_report[['Range', 'Variance', 'Standard Deviation', 'IQR']]
 
 # Format to 2 decimal places
 temp_dispersion = temp_dispersion.round(2)
 print("\nTemperature Dispersion Measures:")
 print(temp_dispersion)
 
-# Calculate the coefficient of variation (CV) for temperature
+# The coefficient of variation (CV) for temperature is already in the report
 # CV = (standard deviation / mean) * 100
-temp_cv = {}
-for month in monthly_temps.keys():
-    mean = np.mean(monthly_temps[month])
-    temp_cv[month] = (temp_std[month] / mean) * 100
-
-temp_dispersion['CV (%)'] = pd.Series(temp_cv).round(2)
+temp_dispersion['CV (%)'] = temp_report['CV (%)'].round(2)
 print("\nTemperature Dispersion with Coefficient of Variation:")
 print(temp_dispersion)
 
 # Calculate the same dispersion measures for precipitation data
-precip_range = {}
-precip_variance = {}
-precip_std = {}
-precip_iqr = {}
-precip_cv = {}
-
-for month in monthly_precip.keys():
-    precip_range[month] = max(monthly_precip[month]) - min(monthly_precip[month])
-    precip_variance[month] = np.var(monthly_precip[month], ddof=1)
-    precip_std[month] = np.std(monthly_precip[month], ddof=1)
-    q1 = np.percentile(monthly_precip[month], 25)
-    q3 = np.percentile(monthly_precip[month], 75)
-    precip_iqr[month] = q3 - q1
-    
-    # Calculate CV, handling the case of zero mean
-    mean = np.mean(monthly_precip[month])
-    if mean != 0:
-        precip_cv[month] = (precip_std[month] / mean) * 100
-    else:
-        precip_cv[month] = float('inf')  # Infinite CV if mean is zero
+# (CV is reported as infinite when a month's mean is zero)
+precip_report = dispersion_report(*to_long(monthly_precip))
 
 # Create a summary table for precipitation
-precip_dispersion = pd.DataFrame({
-    'Range': precip_range,
-    'Variance': precip_variance,
-    'Standard Deviation': precip_std,
-    'IQR': precip_iqr,
-    'CV (%)': precip_cv
-})
+precip_dispersion = precip_report[['Range', 'Variance', 'Standard Deviation', 'IQR', 'CV (%)']]
 
 # Format to 2 decimal places
 precip_dispersion = precip_dispersion.round(2)
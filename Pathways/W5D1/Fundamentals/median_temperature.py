@@ -1,7 +1,14 @@
+import os
+import sys
+
 import numpy as np
 import pandas as pd
 from scipy import stats
 
+# fast_quantiles.py lives in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from fast_quantiles import quantiles
+
 # Sample temperature data (°C) for a week
 temperatures = [22.5, 23.1, 24.0, 35.7, 21.8, 22.3, 23.5]
 
@@ -60,4 +67,12 @@ even_median = np.median(even_temps)
 manual_even_median = calculate_median(even_temps)
 
 print(f"\nMedian of even-length list: {even_median:.2f}°C")
-print(f"Manually calculated: {manual_even_median:.2f}°C")
\ No newline at end of file
+print(f"Manually calculated: {manual_even_median:.2f}°C")
+
+# Sorting is more work than a median needs: only the middle value (or two)
+# has to be in the right place. fast_quantiles.py uses np.partition to find
+# just those positions, and gets Q1, the median and Q3 from the same pass.
+q1, selected_median, q3 = quantiles(temperatures, [0.25, 0.5, 0.75])
+print(f"\nMedian by selection: {selected_median:.2f}°C")
+print(f"Selection matches NumPy median: {np.isclose(selected_median, median_temp)}")
+print(f"Q1: {q1:.2f}°C, Q3: {q3:.2f}°C, IQR: {q3 - q1:.2f}°C")
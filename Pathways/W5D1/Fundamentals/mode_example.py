@@ -1,8 +1,14 @@
+import os
+import sys
+
 import numpy as np
 import pandas as pd
-from scipy import stats
 import matplotlib.pyplot as plt
 
+# fast_mode.py lives in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from fast_mode import mode
+
 # Temperature data for different cities (°C)
 city_temps = {
     'Phoenix': [28.5, 29.2, 30.1, 31.5, 42.8, 29.8, 30.2],
@@ -20,14 +26,15 @@ print(temps_df)
 # Calculate mean, median, and mode for each city
 city_means = {}
 city_medians = {}
-city_modes = {}
 
 for city, temps in city_temps.items():
     city_means[city] = np.mean(temps)
     city_medians[city] = np.median(temps)
-    mode_result = stats.mode(temps)
-    # Fixed line - directly use mode_result.mode without indexing
-    city_modes[city] = mode_result.mode
+
+# One call finds the mode of every city (each column of temps_df) and always
+# returns the same ModeResult, whatever scipy version is installed
+mode_result = mode(temps_df)
+city_modes = dict(zip(temps_df.columns, mode_result.mode))
 
 # Create a table to compare measures across cities
 comparison_df = pd.DataFrame({
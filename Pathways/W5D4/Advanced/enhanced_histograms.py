@@ -7,6 +7,8 @@ import numpy as np
 import seaborn as sns
 import pandas as pd
 
+from fast_kde import plot_kde
+
 # Set visual style for prettier plots
 sns.set_style("whitegrid")
 
@@ -30,8 +32,11 @@ print("First 5 rows of our DataFrame:")
 print(data.head())
 
 # Plot 1: Basic histogram with Kernel Density Estimate (KDE)
+# The KDE curve comes from fast_kde.py (binned FFT, fast for millions of
+# points); bin_width scales it to the counts of the 20-bin histogram
 plt.figure(figsize=(10, 6))
-sns.histplot(city_a_temps, kde=True, bins=20)
+sns.histplot(city_a_temps, bins=20)
+plot_kde(plt.gca(), city_a_temps, bin_width=np.ptp(city_a_temps) / 20)
 plt.title('Histogram with Kernel Density Estimate (City A)')
 plt.xlabel('Temperature (°C)')
 plt.ylabel('Frequency')
@@ -45,6 +50,8 @@ sns.histplot(data=data, x='Temperature (°C)', hue='City',
              common_norm=False,  # Don't normalize jointly
              alpha=0.6,  # Make slightly transparent
              bins=20)
+# Overlay a smooth density curve for each city (both computed in one pass)
+plot_kde(plt.gca(), data['Temperature (°C)'], data['City'], linewidth=2)
 
 plt.title('Comparison of Temperature Distributions Between Cities')
 plt.show()
@@ -52,7 +59,10 @@ plt.show()
 # Plot 3: Side-by-side histograms using FacetGrid
 # FacetGrid allows creating separate plots for each category
 g = sns.FacetGrid(data, col='City', height=5, aspect=1.2)
-g.map_dataframe(sns.histplot, x='Temperature (°C)', kde=True, bins=20)
+g.map_dataframe(sns.histplot, x='Temperature (°C)', bins=20)
+for city, ax in g.axes_dict.items():
+    city_temps = data.loc[data['City'] == city, 'Temperature (°C)']
+    plot_kde(ax, city_temps, bin_width=np.ptp(city_temps) / 20)
 g.set_axis_labels('Temperature (°C)', 'Count')
 g.set_titles('{col_name}')
 g.tight_layout()
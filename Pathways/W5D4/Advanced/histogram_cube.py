@@ -0,0 +1,256 @@
+# Example 4: Histogram Cubes - bin once, plot many ways
+# This example shows how to count the data ONE time into many fine bins,
+# then build any coarser histogram (5, 15, 30 bins...), any group's histogram
+# and density-normalized versions by adding up those fine bins.
+#
+# A coarse edge rarely falls exactly on a fine edge (a season's own min and
+# max are not on the grid), so the cube also keeps the values, grouped by
+# fine bin the first time such an edge is asked for: only the few values in
+# the fine bin under each coarse edge are compared with it, which makes
+# every count exact, as with np.histogram.
+#
+# Why? Breakouts/answer2.py calls plt.hist on the same temperature column
+# with 5, 15 and 30 bins, and again for every season. Each call scans all
+# the raw data. With a cube the raw data is scanned once, and the cube can be
+# saved to a small .npz file so the plots can be redrawn without the data.
+
+import numpy as np
+import pandas as pd
+
+# 3600 is divisible by 5, 10, 15, 20, 25, 30, 40, 50, 60... so most bin
+# counts line up exactly with the fine bins
+DEFAULT_FINE_BINS = 3600
+
+
+class HistogramCube:
+    """Fine-bin counts for every group, plus each group's exact min and max
+
+    A cube made by from_data() also holds the values, to resolve coarse edges
+    inside a fine bin. A cube read by load() has only the counts; its
+    histograms move each coarse edge to the nearest fine edge and return
+    those edges, so the counts are still exact for them.
+    """
+
+    def __init__(self, counts, low, high, labels=None, mins=None, maxs=None):
+        self.counts = np.asarray(counts, dtype=np.int64)
+        if self.counts.ndim == 1:
+            self.counts = self.counts[None, :]
+        self.low = float(low)
+        self.high = float(high)
+        self.labels = list(labels) if labels is not None else ['all']
+        self.mins = np.asarray(mins if mins is not None else [low] * len(self.labels), dtype=np.float64)
+        self.maxs = np.asarray(maxs if maxs is not None else [high] * len(self.labels), dtype=np.float64)
+        self.fine_edges = np.linspace(self.low, self.high, self.counts.shape[1] + 1)
+        # Start of every (group, fine bin) in the values ordered by bin
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts.ravel())])
+        self._unbinned = None  # (values, group * fine_bins + fine bin), set by from_data()
+        self._binned = None
+
+    @classmethod
+    def from_data(cls, values, groups=None, fine_bins=DEFAULT_FINE_BINS, value_range=None):
+        """Count values into fine bins per group with one np.bincount
+
+        Args:
+            values: The measurements (NaN values are skipped)
+            groups: Optional group label for each value (e.g. season);
+                    a pandas column works best (categorical is fastest)
+            fine_bins: Number of fine bins across the whole range
+            value_range: (low, high); defaults to the data's min and max,
+                         which is also what plt.hist uses
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if groups is None:
+            codes = np.zeros(len(values), dtype=np.int64)
+            labels = ['all']
+        else:
+            # pandas hashes labels much faster than np.unique sorts strings
+            codes, labels = pd.factorize(pd.Series(groups), sort=True)
+
+        keep = ~np.isnan(values)
+        values, codes = values[keep], codes[keep]
+        low, high = value_range if value_range is not None else (values.min(), values.max())
+        if high <= low:
+            high = low + 1.0
+
+        width = (high - low) / fine_bins
+        idx = np.floor((values - low) / width).astype(np.int64)
+        # The top edge belongs to the last bin, like np.histogram
+        np.clip(idx, 0, fine_bins - 1, out=idx)
+        # Rounding can put a value lying on a fine edge in the wrong bin;
+        # compare with the edges themselves, as np.histogram does
+        fine_edges = np.linspace(low, high, fine_bins + 1)
+        idx[values < fine_edges[idx]] -= 1
+        idx[(values >= fine_edges[idx + 1]) & (idx < fine_bins - 1)] += 1
+
+        n_groups = len(labels)
+        keys = codes * fine_bins + idx
+        counts = np.bincount(keys, minlength=n_groups * fine_bins)
+
+        mins = np.full(n_groups, np.inf)
+        maxs = np.full(n_groups, -np.inf)
+        np.minimum.at(mins, codes, values)
+        np.maximum.at(maxs, codes, values)
+        cube = cls(counts.reshape(n_groups, fine_bins), low, high, labels, mins, maxs)
+        cube._unbinned = (values, keys)
+        return cube
+
+    def _binned_values(self):
+        """The values ordered by (group, fine bin); None for a loaded cube"""
+        if self._binned is None and self._unbinned is not None:
+            values, keys = self._unbinned
+            # A stable sort of small unsigned keys is a radix sort: a few passes
+            order = np.argsort(keys.astype(np.min_scalar_type(self.counts.size)), kind='stable')
+            self._binned, self._unbinned = values[order], None
+        return self._binned
+
+    # -------------------------------------------------------------------------
+    # Deriving histograms
+    # -------------------------------------------------------------------------
+
+    def _group_rows(self, group):
+        """Row numbers for None (all groups), one label or a list of labels
+
+        Labels with no data in the cube are skipped, so they give an empty
+        histogram (like plt.hist on an empty selection) rather than an error.
+        """
+        if group is None:
+            return list(range(len(self.labels)))
+        if not isinstance(group, (list, tuple, np.ndarray)):
+            group = [group]
+        return [self.labels.index(g) for g in group if g in self.labels]
+
+    def histogram(self, bins=10, group=None, density=False, value_range=None):
+        """Counts and edges for `bins` equal-width bins, like np.histogram
+
+        The default range is the selected groups' own min and max, as with
+        plt.hist. The counts are exact: the same as np.histogram on the
+        selected values (see the class docstring for loaded cubes).
+
+        Returns:
+            (counts, edges). counts are floats when density=True, in which
+            case they integrate to 1 (counts / (total * bin width)).
+        """
+        rows = self._group_rows(group)
+        if not rows:
+            edges = np.linspace(*(value_range or (0.0, 1.0)), bins + 1)
+            return np.zeros(bins, dtype=np.float64 if density else np.int64), edges
+        if value_range is None:
+            value_range = (self.mins[rows].min(), self.maxs[rows].max())
+        edges = np.linspace(value_range[0], value_range[1], bins + 1)
+
+        n_fine = self.counts.shape[1]
+        if self._binned is None and self._unbinned is None:
+            # Move every coarse edge to the nearest fine edge
+            edge_at = np.abs(edges[:, None] - self.fine_edges[None, :]).argmin(axis=1)
+            edges = self.fine_edges[edge_at]
+            below = sum(self.offsets[row * n_fine + edge_at] - self.offsets[row * n_fine] for row in rows)
+            return self._finish(np.diff(below), edges, density)
+
+        # Values below each coarse edge: the whole fine bins below it, plus
+        # the values in the edge's own fine bin that are smaller than it (the
+        # last edge is inclusive, like np.histogram)
+        fine_bin = np.clip(np.searchsorted(self.fine_edges, edges, side='right') - 1, 0, n_fine - 1)
+        last = len(edges) - 1
+        below = np.zeros(len(edges), dtype=np.int64)
+        for row in rows:
+            starts = self.offsets[row * n_fine + fine_bin]
+            stops = self.offsets[row * n_fine + fine_bin + 1]
+            below += starts - self.offsets[row * n_fine]
+            for i, (start, stop) in enumerate(zip(starts, stops)):
+                if i == last and edges[i] >= self.high:
+                    below[i] += stop - start
+                elif i < last and edges[i] == self.fine_edges[fine_bin[i]]:
+                    continue  # on a fine edge: nothing in its bin is smaller
+                elif stop > start:
+                    inside = self._binned_values()[start:stop]
+                    below[i] += np.count_nonzero(inside <= edges[i] if i == last else inside < edges[i])
+        return self._finish(np.diff(below), edges, density)
+
+    @staticmethod
+    def _finish(counts, edges, density):
+        """(counts, edges), normalized to a density if asked"""
+        if density:
+            total = counts.sum()
+            counts = counts / (total * np.diff(edges)) if total else counts * 0.0
+        return counts, edges
+
+    def histograms(self, bins=10, density=False, value_range=None):
+        """{label: (counts, edges)} for every group"""
+        return {label: self.histogram(bins, label, density, value_range) for label in self.labels}
+
+    def plot(self, ax, bins=10, group=None, density=False, value_range=None, **kwargs):
+        """Draw a histogram from the cube, styled like ax.hist(**kwargs)"""
+        counts, edges = self.histogram(bins, group, density, value_range)
+        return ax.hist(edges[:-1], bins=edges, weights=counts, **kwargs)
+
+    def total(self, group=None):
+        """Number of values counted for a group (or all groups)"""
+        return int(self.counts[self._group_rows(group)].sum())
+
+    # -------------------------------------------------------------------------
+    # Saving and loading
+    # -------------------------------------------------------------------------
+
+    def save(self, path):
+        """Save to a compressed .npz file (no raw data needed to re-plot)"""
+        np.savez_compressed(path, counts=self.counts, low=self.low, high=self.high,
+                            labels=np.asarray(self.labels, dtype=str),
+                            mins=self.mins, maxs=self.maxs)
+
+    @classmethod
+    def load(cls, path):
+        """Load a cube written by save()"""
+        with np.load(path) as saved:
+            return cls(saved['counts'], saved['low'], saved['high'],
+                       saved['labels'].tolist(), saved['mins'], saved['maxs'])
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    # Same kind of data as bin_size_normalize.py: a mix of two groups
+    rng = np.random.default_rng(42)
+    n = 5_000_000
+    scores = np.concatenate([rng.normal(70, 10, int(n * 0.7)), rng.normal(85, 5, int(n * 0.3))])
+    groups = pd.Categorical(np.where(np.arange(scores.size) < n * 0.7, 'Group 1', 'Group 2'))
+
+    start = time.perf_counter()
+    cube = HistogramCube.from_data(scores, groups)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    direct = {bins: np.histogram(scores, bins=bins)[0] for bins in (5, 10, 15, 20, 30, 50)}
+    direct_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    derived = {bins: cube.histogram(bins)[0] for bins in (5, 10, 15, 20, 30, 50)}
+    derived_time = time.perf_counter() - start
+
+    print(f"Values: {n:,}")
+    print(f"Build cube once:              {build_time:.3f}s")
+    print(f"np.histogram x6 on raw data:  {direct_time:.3f}s")
+    start = time.perf_counter()
+    for bins in (5, 10, 15, 20, 30, 50):
+        cube.histogram(bins, group='Group 1')
+    again_time = time.perf_counter() - start
+    print(f"6 histograms from the cube:   {derived_time:.4f}s (the first one groups the values by fine bin)")
+    print(f"6 more (for Group 1):         {again_time:.4f}s")
+    for bins in direct:
+        print(f"  {bins:2d} bins match np.histogram: {np.array_equal(direct[bins], derived[bins])}")
+
+    density, edges = cube.histogram(15, density=True)
+    reference, _ = np.histogram(scores, bins=15, density=True)
+    print(f"Density version matches: {np.allclose(density, reference)}")
+
+    group_counts, _ = cube.histogram(20, group='Group 2')
+    print(f"Group 2 adds up to its count: {group_counts.sum() == cube.total('Group 2')}")
+
+    path = os.path.join(tempfile.gettempdir(), 'scores_cube.npz')
+    cube.save(path)
+    reloaded = HistogramCube.load(path)
+    print(f"Saved cube size: {os.path.getsize(path) / 1024:.1f} KB "
+          f"(raw data: {scores.nbytes / 1024 / 1024:.1f} MB)")
+    print(f"Reloaded cube gives the same histogram: "
+          f"{np.array_equal(reloaded.histogram(30)[0], derived[30])}")
@@ -1,19 +1,31 @@
 # Import necessary libraries
-import pandas as pd
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
-data = pd.read_csv('seasons.csv')
+# box_stats.py and typed_loader.py live in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from box_stats import box_stats, stats_table
+from typed_loader import load_csv
+
+data = load_csv('seasons.csv', report=True)  # typed (category/float32) and cached
 
 # Solution 1: Basic box plot with Matplotlib
-plt.figure(figsize=(12, 6))
-data.boxplot(column='temperature', by='season', figsize=(12, 6))
+# The quartiles, whiskers and outliers are computed once for every season,
+# then ax.bxp only draws them (data.boxplot would recompute them per render)
+season_stats = box_stats(data['temperature'], data['season'])
+print("Box plot statistics by season:")
+print(stats_table(season_stats).round(2))
+
+fig, ax = plt.subplots(figsize=(12, 6))
+ax.bxp(season_stats)
 plt.title('Seasonal Temperature Distributions')
 plt.xlabel('Season')
 plt.ylabel('Temperature (°C)')
 plt.grid(True, linestyle='--', alpha=0.7)
-plt.suptitle('')  # Remove the automatic title
 plt.tight_layout()
 # plt.show()
 
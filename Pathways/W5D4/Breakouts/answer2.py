@@ -1,16 +1,28 @@
 # Histogram Exercise Solution
 
 # Import necessary libraries
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-import seaborn as sns
 
-data = pd.read_csv('seasons.csv')
+# histogram_cube.py, fast_kde.py and typed_loader.py live in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from fast_kde import plot_kde
+from histogram_cube import HistogramCube
+from typed_loader import load_csv
+
+data = load_csv('seasons.csv', report=True)  # typed (category/float32) and cached
+
+# Bin the temperatures ONCE into fine bins for every season. Every histogram
+# below (5, 15, 30 bins, per season) is built from these counts instead of
+# rescanning the data, with the same counts as plt.hist.
+cube = HistogramCube.from_data(data['temperature'], groups=data['season'])
 
 # 1. Create a histogram of overall temperature distribution
 plt.figure(figsize=(10, 6))
-plt.hist(data['temperature'], bins=15, color='skyblue', edgecolor='black')
+cube.plot(plt.gca(), bins=15, color='skyblue', edgecolor='black')
 plt.title('Overall Temperature Distribution')
 plt.xlabel('Temperature (°C)')
 plt.ylabel('Frequency')
@@ -22,21 +34,21 @@ plt.close()
 fig, axs = plt.subplots(1, 3, figsize=(15, 5))
 
 # Few bins (5)
-axs[0].hist(data['temperature'], bins=5, color='skyblue', edgecolor='black')
+cube.plot(axs[0], bins=5, color='skyblue', edgecolor='black')
 axs[0].set_title('Temperature Distribution (5 bins)')
 axs[0].set_xlabel('Temperature (°C)')
 axs[0].set_ylabel('Frequency')
 axs[0].grid(axis='y', alpha=0.75)
 
 # Medium bins (15)
-axs[1].hist(data['temperature'], bins=15, color='skyblue', edgecolor='black')
+cube.plot(axs[1], bins=15, color='skyblue', edgecolor='black')
 axs[1].set_title('Temperature Distribution (15 bins)')
 axs[1].set_xlabel('Temperature (°C)')
 axs[1].set_ylabel('Frequency')
 axs[1].grid(axis='y', alpha=0.75)
 
 # Many bins (30)
-axs[2].hist(data['temperature'], bins=30, color='skyblue', edgecolor='black')
+cube.plot(axs[2], bins=30, color='skyblue', edgecolor='black')
 axs[2].set_title('Temperature Distribution (30 bins)')
 axs[2].set_xlabel('Temperature (°C)')
 axs[2].set_ylabel('Frequency')
@@ -57,7 +69,7 @@ for i, (season, color) in enumerate(zip(seasons, colors)):
     row, col = i // 2, i % 2
     season_data = data[data['season'] == season]['temperature']
     
-    axs[row, col].hist(season_data, bins=10, color=color, edgecolor='black', alpha=0.7)
+    cube.plot(axs[row, col], bins=10, group=season, color=color, edgecolor='black', alpha=0.7)
     axs[row, col].set_title(f'{season} Temperature Distribution')
     axs[row, col].set_xlabel('Temperature (°C)')
     axs[row, col].set_ylabel('Frequency')
@@ -74,10 +86,11 @@ plt.savefig('seasonal_histograms.png')
 plt.close()
 
 # Overlaid seasonal distributions using KDE plots for better comparison
+# All seasons are smoothed together with one binned FFT (fast_kde.py);
+# seasons with no data (Fall here) are skipped, as sns.kdeplot does
 plt.figure(figsize=(12, 6))
-for season, color in zip(seasons, colors):
-    season_data = data[data['season'] == season]['temperature']
-    sns.kdeplot(season_data, label=season, color=color, fill=True, alpha=0.3)
+plot_kde(plt.gca(), data['temperature'], data['season'], order=seasons, colors=colors,
+         fill=True, alpha=0.3)
 
 plt.title('Seasonal Temperature Distributions')
 plt.xlabel('Temperature (°C)')
@@ -89,11 +102,12 @@ plt.close()
 
 # Calculate and print statistical summaries for each season
 print("Statistical Summary of Seasonal Temperatures:")
-print(data.groupby('season')['temperature'].agg(['min', 'max', 'mean', 'std']).round(2))
+# Temperatures are float32; widen the summary so rounded values print cleanly
+print(data.groupby('season')['temperature'].agg(['min', 'max', 'mean', 'std']).astype('float64').round(2))
 
 # Calculate the temperature range that occurs most frequently
 # Using the bin with highest frequency from the overall histogram
-hist, bin_edges = np.histogram(data['temperature'], bins=15)
+hist, bin_edges = cube.histogram(bins=15)
 max_freq_bin_index = np.argmax(hist)
 most_common_range = (bin_edges[max_freq_bin_index], bin_edges[max_freq_bin_index + 1])
 print(f"\nMost frequently occurring temperature range: {most_common_range[0]:.1f}°C to {most_common_range[1]:.1f}°C")
\ No newline at end of file
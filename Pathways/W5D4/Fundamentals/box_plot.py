@@ -2,9 +2,16 @@
 # This example shows how to create a simple box plot to compare distributions
 
 # Import required libraries
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# box_stats.py lives in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from box_stats import box_stats_list
+
 # Set a random seed for reproducibility
 np.random.seed(42)
 # Generate three datasets with different variances
@@ -20,8 +27,14 @@ data = [low_variance, medium_variance, high_variance]
 fig, ax = plt.subplots(figsize=(10, 6))
 
 # Create a box plot on the axis
-# The boxplot function takes a list of datasets
-box_plot = ax.boxplot(data)
+# ax.boxplot(data) would work out the quartiles and whiskers itself every time
+# the plot is drawn. Here we compute them once (a list of small dictionaries)
+# and ax.bxp only draws them - the same picture, and the numbers can be reused
+stats = box_stats_list(data, labels=['Low Variance', 'Medium Variance', 'High Variance'])
+for s in stats:
+    print(f"{s['label']}: median {s['med']:.2f}, IQR {s['iqr']:.2f}, "
+          f"whiskers {s['whislo']:.2f} to {s['whishi']:.2f}, {s['n_fliers']} outliers")
+box_plot = ax.bxp(stats)
 
 # Add labels to make the plot more readable
 ax.set_xticklabels(['Low Variance', 'Medium Variance', 'High Variance'])
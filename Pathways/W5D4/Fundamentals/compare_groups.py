@@ -2,25 +2,52 @@
 # This example shows how to compare distributions across multiple categories and groups
 
 # Import required libraries
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import pandas as pd
 
-data = pd.read_csv('groups.csv')
+# box_stats.py and typed_loader.py live in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from box_stats import box_stats, stats_table
+from typed_loader import load_csv
+
+# season and time are read as categories and temperature as float32; the
+# typed copy is cached so the next run skips parsing the CSV
+data = load_csv('groups.csv', report=True)
 
 # Show the first few rows
 print("First 5 rows of our weather DataFrame:")
 print(data.head())
 
+# Work out the box plot numbers for every (season, time) pair in one pass.
+# sns.boxplot(x='season', y='temperature', hue='time', data=data) would
+# compute these again on every render; here they are computed once
+stats = box_stats(data['temperature'], [data['season'], data['time']])
+print("\nBox plot statistics for each season and time of day:")
+print(stats_table(stats).round(2))
+
 # Create a figure
-plt.figure(figsize=(12, 6))
+fig, ax = plt.subplots(figsize=(12, 6))
 
-# Create a grouped box plot
-# x: category for x-axis (seasons)
-# y: values for y-axis (temperatures)
-# hue: grouping variable (time of day)
-sns.boxplot(x='season', y='temperature', hue='time', data=data)
+# Draw a grouped box plot from the statistics
+# x: seasons, with one box per time of day side by side (like hue in seaborn)
+seasons = list(pd.unique(data['season']))
+times = list(pd.unique(data['time']))
+colors = sns.color_palette(n_colors=len(times))
+width = 0.8 / len(times)
+positions = [seasons.index(s['group'][0]) + (times.index(s['group'][1]) - (len(times) - 1) / 2) * width
+             for s in stats]
+boxes = ax.bxp(stats, positions=positions, widths=width * 0.9, patch_artist=True,
+               manage_ticks=False, medianprops={'color': 'black'})
+for s, box in zip(stats, boxes['boxes']):
+    box.set_facecolor(colors[times.index(s['group'][1])])
+ax.set_xticks(range(len(seasons)), seasons)
+for time_of_day, color in zip(times, colors):
+    ax.bar(0, 0, color=color, label=time_of_day)  # legend entries only
 
 # Add title and labels
 plt.title('Temperature Distributions by Season and Time of Day')
@@ -0,0 +1,229 @@
+# Day-of-Year Climatology - the "normal" weather for every day of the year
+# Time Series Basics - Session 2
+#
+# A climatology answers "what is usual for this day of the year?" -
+# timeSeriesAnalysis.py builds one with two groupby('dayofyear') passes, and
+# the W9D5 model evaluation with a 365-step loop of boolean filters.
+#
+# Climatology builds it as one (366 x statistics) table:
+#   - every reading gets a day slot (0-365) from its date
+#   - np.bincount adds up the counts, sums and squared deviations of all
+#     readings for all 366 slots at once; np.minimum.at / np.maximum.at give
+#     the extremes
+#   - optional smoothing pools each slot with its neighbours (the year wraps
+#     around, so Dec 31 sits next to Jan 1), and empty slots borrow the
+#     nearest day with data
+# Looking up the normal for any number of dates is then one fancy-indexing
+# step: table[slots].
+#
+# Leap days: 'dayofyear' numbers days like pandas (March 1 is day 60 or 61
+# depending on the year); 'align' keeps 366 calendar slots so March 1 is
+# always the same slot; 'merge' is like 'align' but Feb 29 shares Feb 28's slot.
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+LEAP_MODES = ('dayofyear', 'align', 'merge')
+FEB_28, FEB_29 = 58, 59  # calendar-aligned slots
+
+
+def _calendar_slots(days, leap):
+    """Slot number for each calendar day in a DatetimeIndex"""
+    slots = days.dayofyear.to_numpy().astype(np.int64) - 1
+    if leap == 'dayofyear':
+        return slots
+    # In common years every day from March 1 on moves up one slot, so each
+    # calendar day has the same slot in every year
+    slots += (~days.is_leap_year & (days.month > 2)).astype(np.int64)
+    if leap == 'merge':
+        slots[slots == FEB_29] = FEB_28
+    return slots
+
+
+def day_slots(dates, leap='align'):
+    """Slot number (0-365) for every date
+
+    Long series repeat the same calendar days many times (hourly data, many
+    stations), so the slot is worked out once per calendar day between the
+    first and last date and then looked up for every reading.
+    """
+    if leap not in LEAP_MODES:
+        raise ValueError(f"leap must be one of {LEAP_MODES}")
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)  # local calendar days
+    days = dates.to_numpy().astype('datetime64[D]').view(np.int64)
+    if days.size == 0:
+        return days
+    first = days.min()
+    calendar = pd.DatetimeIndex(np.arange(first, days.max() + 1).astype('datetime64[D]'))
+    return _calendar_slots(calendar, leap)[days - first]
+
+
+def _window(values, half, circular, reduce, edge):
+    """Combine each slot with its `half` neighbours on each side
+
+    Args:
+        values: One value per slot
+        half: Neighbours on each side
+        circular: Wrap around the end of the year; otherwise pad with `edge`
+        reduce: np.sum, np.min or np.max
+        edge: Padding value that does not change the result (0, inf, -inf)
+    """
+    if circular:
+        padded = np.concatenate([values[-half:], values, values[:half]])
+    else:
+        padded = np.pad(values, half, constant_values=edge)
+    return reduce(sliding_window_view(padded, 2 * half + 1), axis=1)
+
+
+def _nearest_filled(has_data, circular):
+    """For every slot, the nearest slot with data (ties go to the earlier day)"""
+    filled = np.flatnonzero(has_data)
+    slots = np.arange(len(has_data))
+    if circular:
+        candidates = np.concatenate([filled - len(has_data), filled, filled + len(has_data)])
+    else:
+        candidates = filled
+    right = np.clip(np.searchsorted(candidates, slots), 1, len(candidates) - 1)
+    left = right - 1
+    if len(candidates) == 1:
+        nearest = np.zeros_like(slots)
+    else:
+        pick_right = np.abs(candidates[right] - slots) < np.abs(slots - candidates[left])
+        nearest = np.where(pick_right, right, left)
+    return candidates[nearest] % len(has_data)
+
+
+class Climatology:
+    """Per-day-of-year count, mean, std, min and max, built in one pass
+
+    Example:
+        normals = Climatology(weather_df.index, weather_df['temperature'])
+        expected = normals.expected(year_2022.index)
+        z = normals.z_scores(year_2022.index, year_2022['temperature'])
+    """
+
+    def __init__(self, dates, values, leap='align', smooth=1, fill=True, circular=True):
+        """
+        Args:
+            dates: Date of each reading (DatetimeIndex or datetime column)
+            values: The readings (NaN values are skipped)
+            leap: 'dayofyear', 'align' or 'merge' (see the top of this file)
+            smooth: Window in days to pool around each day (1 = no smoothing;
+                    e.g. 15 uses a week either side)
+            fill: Give days without data the statistics of the nearest day
+            circular: Treat Dec 31 and Jan 1 as neighbours when smoothing
+                      and filling
+        """
+        self.leap = leap
+        self.smooth = smooth
+        slots = day_slots(dates, leap)
+        values = np.asarray(values, dtype=np.float64)
+        keep = ~np.isnan(values)
+        slots, values = slots[keep], values[keep]
+
+        # Sums are taken around the overall mean so squares stay small
+        self.overall_mean = values.mean() if values.size else np.nan
+        shifted = values - self.overall_mean
+        count = np.bincount(slots, minlength=366).astype(np.float64)
+        total = np.bincount(slots, weights=shifted, minlength=366)
+        squares = np.bincount(slots, weights=shifted * shifted, minlength=366)
+        minimum = np.full(366, np.inf)
+        maximum = np.full(366, -np.inf)
+        np.minimum.at(minimum, slots, values)
+        np.maximum.at(maximum, slots, values)
+
+        if smooth > 1:
+            # Pooling sums (not means) weights every reading equally
+            half = smooth // 2
+            count, total, squares = (_window(a, half, circular, np.sum, 0.0)
+                                     for a in (count, total, squares))
+            minimum = _window(minimum, half, circular, np.min, np.inf)
+            maximum = _window(maximum, half, circular, np.max, -np.inf)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            var = (squares - total * mean) / (count - 1)
+        table = np.column_stack([
+            count,
+            mean + self.overall_mean,
+            np.sqrt(np.where(count > 1, np.maximum(var, 0.0), np.nan)),
+            np.where(count > 0, minimum, np.nan),
+            np.where(count > 0, maximum, np.nan),
+        ])
+
+        has_data = count > 0
+        if fill and has_data.any() and not has_data.all():
+            source = _nearest_filled(has_data, circular)
+            table[~has_data, 1:] = table[source[~has_data], 1:]
+        self.table = table
+
+    @property
+    def frame(self):
+        """The climatology as a DataFrame indexed by day number 1-366"""
+        return pd.DataFrame(self.table, columns=['count', 'mean', 'std', 'min', 'max'],
+                            index=pd.RangeIndex(1, 367, name='day'))
+
+    def lookup(self, dates, column='mean'):
+        """Climatology values for each date (one fancy-indexing step)"""
+        position = ['count', 'mean', 'std', 'min', 'max'].index(column)
+        return self.table[day_slots(dates, self.leap), position]
+
+    def expected(self, dates):
+        """The normal (mean) value for each date"""
+        return self.lookup(dates, 'mean')
+
+    def z_scores(self, dates, values):
+        """How many standard deviations each reading is from its day's normal"""
+        slots = day_slots(dates, self.leap)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (np.asarray(values, dtype=np.float64) - self.table[slots, 1]) / self.table[slots, 2]
+
+    def anomalies(self, dates, values, k=2.0):
+        """True where a reading is more than k standard deviations from normal"""
+        return np.abs(self.z_scores(dates, values)) > k
+
+
+if __name__ == "__main__":
+    import time
+
+    # Thirty years of daily readings for 200 stations
+    rng = np.random.default_rng(42)
+    dates = pd.date_range('1994-01-01', '2023-12-31', freq='D')
+    n_stations = 200
+    all_dates = np.tile(dates, n_stations)
+    day = np.tile(np.arange(len(dates)), n_stations)
+    temps = 12 - 10 * np.cos(2 * np.pi * day / 365.25) + rng.normal(0, 3, day.size)
+    frame = pd.DataFrame({'temperature': temps}, index=pd.DatetimeIndex(all_dates))
+    print(f"{len(frame):,} readings")
+
+    start = time.perf_counter()
+    frame['dayofyear'] = frame.index.dayofyear
+    daily_means = frame.groupby('dayofyear')['temperature'].mean()
+    daily_stds = frame.groupby('dayofyear')['temperature'].std()
+    expected_range = pd.DataFrame({'lower': daily_means - 2 * daily_stds,
+                                   'upper': daily_means + 2 * daily_stds})
+    bounds = expected_range.loc[frame['dayofyear']]
+    groupby_flags = ((frame['temperature'].to_numpy() < bounds['lower'].to_numpy())
+                     | (frame['temperature'].to_numpy() > bounds['upper'].to_numpy()))
+    groupby_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    normals = Climatology(frame.index, frame['temperature'], leap='dayofyear')
+    flags = normals.anomalies(frame.index, frame['temperature'])
+    fast_time = time.perf_counter() - start
+
+    print(f"groupby x2 + .loc lookup:         {groupby_time:.2f}s")
+    print(f"Climatology + fancy indexing:     {fast_time:.2f}s")
+    print(f"Same means and stds as groupby: "
+          f"{np.allclose(normals.frame['mean'], daily_means)} "
+          f"{np.allclose(normals.frame['std'], daily_stds)}")
+    print(f"Same anomalies flagged: {np.array_equal(flags, groupby_flags)} ({flags.sum():,})")
+
+    aligned = Climatology(frame.index, frame['temperature'], leap='merge', smooth=15)
+    march_first = pd.DatetimeIndex(['2023-03-01', '2024-03-01'])
+    print(f"March 1 uses the same slot in common and leap years: "
+          f"{len(set(day_slots(march_first, 'merge'))) == 1}")
+    print(aligned.frame.loc[[1, 59, 60, 182, 366]].round(2))
@@ -0,0 +1,238 @@
+# Incremental Rolling Statistics - update 7/30/90/365-day windows one day at a time
+# Time Series Basics - Session 2
+#
+# series.rolling(window).mean() recomputes every window over the whole
+# history. That is fine once, but when one new reading arrives each day the
+# whole calculation is repeated just to get one new value per window.
+#
+# RollingStats keeps a small state for every window size instead:
+#   - one ring buffer holding the last max(windows) readings (shared by all
+#     window sizes), so the reading that drops out of each window is known
+#   - a running count, mean and M2 per window (Welford's method, with a
+#     matching "remove" step), for the mean, variance and standard deviation
+#   - two monotonic deques per window for the minimum and maximum: each
+#     reading is pushed and popped at most once
+# append() then updates every window in O(1) (amortized for min/max).
+# extend() loads a long history in bulk with pandas and then picks up the
+# state from its last readings, so appends continue where it left off.
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+STATS = ('mean', 'std', 'var', 'min', 'max', 'sum', 'count')
+
+
+class _WindowState:
+    """Running statistics for one window size"""
+
+    def __init__(self, size):
+        self.size = size
+        self.count = 0       # non-missing readings in the window
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.mins = deque()  # (position, value), values increasing
+        self.maxs = deque()  # (position, value), values decreasing
+
+    def add(self, position, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        while self.mins and self.mins[-1][1] >= x:
+            self.mins.pop()
+        self.mins.append((position, x))
+        while self.maxs and self.maxs[-1][1] <= x:
+            self.maxs.pop()
+        self.maxs.append((position, x))
+
+    def remove(self, x):
+        """Undo add() for a reading leaving the window (Welford in reverse)"""
+        self.count -= 1
+        if self.count == 0:
+            self.mean, self.m2 = 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (x - self.mean)
+
+    def expire(self, position):
+        """Drop min/max candidates that are no longer inside the window"""
+        oldest = position - self.size
+        while self.mins and self.mins[0][0] <= oldest:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] <= oldest:
+            self.maxs.popleft()
+
+
+class RollingStats:
+    """Rolling statistics for several window sizes that update on append
+
+    Results match series.rolling(window, min_periods).agg(...) in pandas:
+    missing values (NaN) are skipped, and a window gives NaN until it holds
+    min_periods readings (by default a full window).
+
+    Example:
+        rolling = RollingStats(windows=(7, 30), stats=('mean', 'std'))
+        history = rolling.extend(weather_df['temperature'])  # DataFrame
+        latest = rolling.append(todays_temperature)          # dict
+        latest['mean_30']
+    """
+
+    def __init__(self, windows=(7, 30), stats=('mean', 'std'), min_periods=None):
+        """
+        Args:
+            windows: Window sizes (number of readings)
+            stats: Any of STATS
+            min_periods: Readings needed before a value is given (default:
+                         the window size, like pandas)
+        """
+        unknown = set(stats) - set(STATS)
+        if unknown:
+            raise ValueError(f"Unknown statistics {sorted(unknown)}; use {STATS}")
+        self.windows = sorted(set(int(w) for w in windows))
+        self.stats = list(stats)
+        self.min_periods = min_periods
+        self.capacity = self.windows[-1]
+        self._buffer = np.full(self.capacity, np.nan)
+        self._appended = 0
+        self._states = {w: _WindowState(w) for w in self.windows}
+
+    @property
+    def columns(self):
+        """Output names, e.g. 'mean_7', 'std_30'"""
+        return [f"{stat}_{w}" for w in self.windows for stat in self.stats]
+
+    def _needed(self, window):
+        return window if self.min_periods is None else min(self.min_periods, window)
+
+    def _values(self, state):
+        """The requested statistics for one window's current state"""
+        enough = state.count >= self._needed(state.size)
+        results = {}
+        for stat in self.stats:
+            if stat == 'count':
+                value = float(state.count)
+            elif not enough or state.count == 0:
+                value = np.nan
+            elif stat == 'mean':
+                value = state.mean
+            elif stat == 'sum':
+                value = state.mean * state.count
+            elif stat == 'min':
+                value = state.mins[0][1]
+            elif stat == 'max':
+                value = state.maxs[0][1]
+            elif state.count < 2:
+                value = np.nan
+            else:
+                # Rounding can leave a tiny negative M2 for constant data
+                var = max(state.m2, 0.0) / (state.count - 1)
+                value = var if stat == 'var' else np.sqrt(var)
+            results[f"{stat}_{state.size}"] = value
+        return results
+
+    def append(self, x):
+        """Add one reading and return the updated statistics for every window"""
+        x = float(x)
+        position = self._appended
+        results = {}
+        for w, state in self._states.items():
+            if position >= w:
+                leaving = self._buffer[(position - w) % self.capacity]
+                if not np.isnan(leaving):
+                    state.remove(leaving)
+            if not np.isnan(x):
+                state.add(position, x)
+            state.expire(position)
+            results.update(self._values(state))
+        # Written after the loop: the largest window reads this slot first
+        self._buffer[position % self.capacity] = x
+        self._appended += 1
+        return results
+
+    def extend(self, values):
+        """Add many readings at once; returns one row of statistics per reading
+
+        The rows are computed with pandas' rolling functions over the new
+        readings plus the previous window of history, then the running state
+        is rebuilt from the last max(windows) readings, so later appends give
+        the same answers as if every reading had been appended one by one.
+        """
+        index = values.index if isinstance(values, pd.Series) else None
+        new = np.asarray(values, dtype=np.float64)
+        previous = self._recent(self.capacity - 1)
+        series = pd.Series(np.concatenate([previous, new]))
+
+        columns = {}
+        for w in self.windows:
+            rolling = series.rolling(w, min_periods=self._needed(w))
+            for stat in self.stats:
+                if stat == 'count':
+                    result = series.rolling(w, min_periods=0).count()
+                else:
+                    result = getattr(rolling, stat)()
+                columns[f"{stat}_{w}"] = result.to_numpy()[len(previous):]
+
+        self._load(np.concatenate([previous, new])[-self.capacity:], self._appended + len(new))
+        return pd.DataFrame(columns, index=index)[self.columns]
+
+    def _recent(self, n):
+        """The last n readings (fewer if not that many yet), oldest first"""
+        n = min(n, self._appended)
+        positions = np.arange(self._appended - n, self._appended)
+        return self._buffer[positions % self.capacity]
+
+    def _load(self, tail, appended):
+        """Rebuild the buffer and every window's state from the last readings"""
+        self._appended = appended - len(tail)
+        self._buffer[:] = np.nan
+        self._states = {w: _WindowState(w) for w in self.windows}
+        for x in tail:
+            self.append(x)
+
+
+if __name__ == "__main__":
+    import time
+
+    # Ten years of daily temperatures, then 365 new days arriving one by one
+    rng = np.random.default_rng(42)
+    days = np.arange(3650 + 365)
+    temps = 15 + 12 * np.sin(2 * np.pi * days / 365.25) + rng.normal(0, 3, days.size)
+    temps[rng.choice(days.size, 40, replace=False)] = np.nan  # missing readings
+    history, new_days = temps[:3650], temps[3650:]
+    windows, stats = (7, 30, 90, 365), ('mean', 'std', 'min', 'max')
+
+    # Recomputing everything with pandas every time a day arrives
+    start = time.perf_counter()
+    series = pd.Series(history)
+    for x in new_days:
+        series = pd.concat([series, pd.Series([x])], ignore_index=True)
+        latest_pandas = {f"{s}_{w}": getattr(series.rolling(w), s)().iloc[-1]
+                         for w in windows for s in stats}
+    recompute_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rolling = RollingStats(windows, stats)
+    rolling.extend(history)
+    streamed = [rolling.append(x) for x in new_days]
+    append_time = time.perf_counter() - start
+
+    full = pd.Series(temps)
+    expected = pd.DataFrame({f"{s}_{w}": getattr(full.rolling(w), s)()
+                             for w in windows for s in stats}).iloc[3650:]
+    streamed = pd.DataFrame(streamed, index=expected.index)[expected.columns]
+
+    print(f"{len(new_days)} new days on top of {len(history)} days of history, "
+          f"{len(windows)} windows x {len(stats)} statistics")
+    print(f"Recompute with pandas on every new day: {recompute_time:.2f}s")
+    print(f"RollingStats.append on every new day:   {append_time:.3f}s")
+    print(f"Streamed values match pandas rolling: "
+          f"{np.allclose(streamed, expected, equal_nan=True)}")
+    print(f"Last reading's result matches: "
+          f"{np.allclose(list(latest_pandas.values()), streamed.iloc[-1][list(latest_pandas)], equal_nan=True)}")
+
+    bulk = RollingStats(windows, stats).extend(temps)
+    print(f"extend() matches pandas rolling: "
+          f"{np.allclose(bulk.iloc[3650:], expected, equal_nan=True)}")
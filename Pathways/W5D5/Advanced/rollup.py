@@ -0,0 +1,278 @@
+# Multi-Frequency Rollup - weekly, monthly, quarterly and yearly stats in one pass
+# Time Series Basics - Session 2
+#
+# timeSeriesAnalysis.py calls resample('M'), resample('Q').agg(...),
+# resample('Y').agg(...) and resample('W') on the same data. Each call groups
+# every row again, which adds up for years of minute-level station data.
+#
+# A Rollup groups the rows ONCE into the finest period that was asked for
+# (the "base" period) and keeps five partial results per period and column:
+#     count, sum, min, max, M2 (sum of squared deviations from the mean)
+# Coarser periods are built by combining those partial results - a few
+# hundred rows instead of millions. The counts, sums, minimums and maximums
+# simply add up or take the min/max. M2 combines exactly with
+#     M2 = sum(M2_i) + sum(n_i * (mean_i - mean)^2)
+# so the means and standard deviations match resample() exactly.
+#
+# Weeks do not fit inside months, so when weeks are asked for together with
+# months, quarters or years, the base period is the day.
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Frequencies from finest to coarsest, with the older pandas aliases
+FREQUENCIES = ['min', 'h', 'D', 'W', 'ME', 'QE', 'YE']
+ALIASES = {'T': 'min', 'H': 'h', 'W-SUN': 'W', 'M': 'ME', 'Q': 'QE', 'Q-DEC': 'QE',
+           'Y': 'YE', 'A': 'YE', 'Y-DEC': 'YE'}
+CALENDAR = {'ME', 'QE', 'YE'}
+
+NS_PER = {'min': 60 * 10**9, 'h': 3600 * 10**9, 'D': 86400 * 10**9}
+
+STATS = ('count', 'sum', 'mean', 'min', 'max', 'std', 'var')
+
+# Partial aggregates for one frequency: codes (one per period) and
+# (periods x columns) arrays
+Partial = namedtuple('Partial', ['codes', 'count', 'total', 'minimum', 'maximum', 'm2'])
+
+
+def _normalize(freq):
+    freq = ALIASES.get(freq, freq)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unsupported frequency {freq!r}; use one of {FREQUENCIES}")
+    return freq
+
+
+def _period_codes(index, freq):
+    """Integer period number for every timestamp, increasing with time"""
+    if freq in NS_PER:
+        return index.as_unit('ns').asi8 // NS_PER[freq]
+    if freq == 'W':
+        # Day 0 (1970-01-01) is a Thursday; +3 makes weeks run Monday-Sunday
+        days = index.as_unit('ns').asi8 // NS_PER['D']
+        return (days + 3) // 7
+    months = index.year.to_numpy().astype(np.int64) * 12 + index.month.to_numpy() - 1
+    if freq == 'ME':
+        return months
+    if freq == 'QE':
+        return months // 3
+    return months // 12
+
+
+def _period_labels(codes, freq):
+    """Timestamps resample() uses as labels: bin start for min/h/D, period end otherwise"""
+    codes = np.asarray(codes, dtype=np.int64)
+    if freq in NS_PER:
+        return pd.DatetimeIndex(codes * NS_PER[freq])
+    if freq == 'W':
+        return pd.DatetimeIndex((codes * 7 + 3) * NS_PER['D'])  # the Sunday
+    months = {'ME': 1, 'QE': 3, 'YE': 12}[freq]
+    first_month = codes * months
+    years, month_index = np.divmod(first_month + months, 12)
+    # Day before the first day of the next period
+    starts = pd.to_datetime({'year': years, 'month': month_index + 1, 'day': 1})
+    return pd.DatetimeIndex(starts - pd.Timedelta(days=1))
+
+
+def _segments(codes):
+    """Start of each run of equal codes (codes must be sorted)"""
+    return np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1])
+
+
+def _aggregate_rows(codes, values):
+    """Partial aggregates of raw rows (codes sorted, values rows x columns)"""
+    starts = _segments(codes)
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    count = np.add.reduceat(present, starts, axis=0).astype(np.int64)
+    total = np.add.reduceat(filled, starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    # Second pass over the rows for M2 (more accurate than sum of squares)
+    lengths = np.diff(np.append(starts, len(codes)))
+    deviations = np.where(present, values - np.repeat(mean, lengths, axis=0), 0.0)
+    m2 = np.add.reduceat(deviations * deviations, starts, axis=0)
+    minimum = np.fmin.reduceat(values, starts, axis=0)
+    maximum = np.fmax.reduceat(values, starts, axis=0)
+    return Partial(codes[starts], count, total, minimum, maximum, m2)
+
+
+def _combine(partial, parent_codes):
+    """Merge consecutive partial aggregates that share a parent period"""
+    starts = _segments(parent_codes)
+    lengths = np.diff(np.append(starts, len(parent_codes)))
+    count = np.add.reduceat(partial.count, starts, axis=0)
+    total = np.add.reduceat(partial.total, starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        child_mean = partial.total / partial.count
+        mean = total / count
+    spread = partial.count * (child_mean - np.repeat(mean, lengths, axis=0)) ** 2
+    spread = np.where(partial.count > 0, spread, 0.0)
+    m2 = np.add.reduceat(partial.m2 + spread, starts, axis=0)
+    minimum = np.fmin.reduceat(partial.minimum, starts, axis=0)
+    maximum = np.fmax.reduceat(partial.maximum, starts, axis=0)
+    return Partial(parent_codes[starts], count, total, minimum, maximum, m2)
+
+
+class Rollup:
+    """Statistics at several frequencies from a single grouping of the rows
+
+    Example:
+        rollup = Rollup(weather_df, freqs=['W', 'ME', 'QE', 'YE'])
+        monthly_avg = rollup.mean('ME')
+        yearly_stats = rollup.agg('YE', {'temperature': ['min', 'mean', 'max', 'std']})
+    """
+
+    def __init__(self, data, freqs=('W', 'ME', 'QE', 'YE'), columns=None):
+        """
+        Args:
+            data: DataFrame (or Series) with a DatetimeIndex
+            freqs: Frequencies to prepare ('min', 'h', 'D', 'W', 'ME', 'QE',
+                   'YE'; 'M', 'Q', 'Y' also work)
+            columns: Numeric columns to roll up (default: all numeric ones)
+        """
+        if isinstance(data, pd.Series):
+            data = data.to_frame()
+        if not isinstance(data.index, pd.DatetimeIndex):
+            raise TypeError("Rollup needs a DataFrame with a DatetimeIndex")
+        self.columns = list(columns) if columns is not None else \
+            list(data.select_dtypes('number').columns)
+        self.freqs = sorted({_normalize(f) for f in freqs}, key=FREQUENCIES.index)
+
+        base = self.freqs[0]
+        if base == 'W' and CALENDAR & set(self.freqs):
+            base = 'D'
+        self.base_freq = base
+
+        # The one pass over the raw rows
+        codes = _period_codes(data.index, base)
+        values = data[self.columns].to_numpy(dtype=np.float64)
+        if not np.all(codes[1:] >= codes[:-1]):
+            order = np.argsort(codes, kind='stable')
+            codes, values = codes[order], values[order]
+        self.levels = {base: _aggregate_rows(codes, values)}
+
+        # Every other frequency from the base periods
+        base_partial = self.levels[base]
+        # A timestamp inside each base period (its label) is enough to find
+        # the coarser period it belongs to
+        inside = _period_labels(base_partial.codes, base)
+        for freq in self.freqs:
+            if freq not in self.levels:
+                self.levels[freq] = _combine(base_partial, _period_codes(inside, freq))
+
+    def _statistic(self, partial, name):
+        count = partial.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if name == 'count':
+                return count
+            if name == 'sum':
+                return partial.total
+            if name == 'mean':
+                return np.where(count > 0, partial.total / count, np.nan)
+            if name == 'min':
+                return partial.minimum
+            if name == 'max':
+                return partial.maximum
+            var = np.where(count > 1, partial.m2 / (count - 1), np.nan)
+            if name == 'var':
+                return var
+            if name == 'std':
+                return np.sqrt(var)
+        raise ValueError(f"Unknown statistic {name!r}; use one of {STATS}")
+
+    def _index(self, freq):
+        """Every period from first to last (empty ones included, like resample)"""
+        codes = self.levels[freq].codes
+        full = np.arange(codes[0], codes[-1] + 1) if len(codes) else codes
+        return full, np.searchsorted(full, codes)
+
+    def agg(self, freq, how):
+        """Like resample(freq).agg(how)
+
+        Args:
+            freq: One of the frequencies given to the constructor
+            how: A statistic name ('mean'), a list of names, or a
+                 {column: [names]} dictionary
+
+        Returns:
+            DataFrame labelled like resample(): columns for a single name,
+            (column, statistic) columns for a list or dictionary
+        """
+        freq = _normalize(freq)
+        if freq not in self.levels:
+            raise ValueError(f"{freq!r} was not prepared; pass it in freqs")
+        partial = self.levels[freq]
+        full, rows = self._index(freq)
+        index = _period_labels(full, freq)
+        index = index.rename(None)
+
+        if isinstance(how, dict):
+            plan = [(column, list(np.atleast_1d(names))) for column, names in how.items()]
+        elif isinstance(how, str):
+            plan = [(column, [how]) for column in self.columns]
+        else:
+            plan = [(column, list(how)) for column in self.columns]
+
+        result = {}
+        for column, names in plan:
+            position = self.columns.index(column)
+            for name in names:
+                # Empty periods: resample() counts and sums them as 0
+                values = np.full(len(full), {'count': 0, 'sum': 0.0}.get(name, np.nan))
+                values[rows] = self._statistic(partial, name)[:, position]
+                result[(column, name)] = values
+        frame = pd.DataFrame(result, index=index)
+        if isinstance(how, str):
+            frame.columns = [column for column, _ in plan]
+        return frame
+
+    def mean(self, freq):
+        """Like resample(freq).mean()"""
+        return self.agg(freq, 'mean')
+
+
+if __name__ == "__main__":
+    import time
+
+    # Twenty years of minute-level readings from one station
+    rng = np.random.default_rng(42)
+    index = pd.date_range('2005-01-01', '2024-12-31 23:59', freq='min')
+    minutes = np.arange(len(index))
+    temperature = 12 + 10 * np.sin(2 * np.pi * minutes / (365.25 * 1440)) + rng.normal(0, 3, len(index))
+    station = pd.DataFrame({'temperature': temperature,
+                            'humidity': 60 + rng.normal(0, 10, len(index))}, index=index)
+    station.iloc[::997, 0] = np.nan  # a few missing readings
+    print(f"{len(station):,} minute readings")
+
+    how = {'temperature': ['min', 'mean', 'max', 'std', 'count']}
+    freqs = ['h', 'D', 'W', 'ME', 'QE', 'YE']
+
+    start = time.perf_counter()
+    separate = {freq: station.resample(freq).agg(how) for freq in freqs}
+    resample_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rollup = Rollup(station, freqs)
+    combined = {freq: rollup.agg(freq, how) for freq in freqs}
+    rollup_time = time.perf_counter() - start
+
+    print(f"resample().agg() for {len(freqs)} frequencies: {resample_time:.2f}s")
+    print(f"One Rollup, same {len(freqs)} frequencies:    {rollup_time:.2f}s "
+          f"(base period: {rollup.base_freq})")
+    for freq in freqs:
+        same = (separate[freq].index.equals(combined[freq].index)
+                and np.allclose(separate[freq].to_numpy(dtype=float),
+                                combined[freq].to_numpy(dtype=float), equal_nan=True))
+        print(f"  {freq:>2} matches resample: {same}")
+    print(combined['YE'].round(3).head())
+
+    # Gaps in the data: the missing days are empty periods
+    gappy = station.loc['2010-01-01':'2010-12-31'].drop(station.loc['2010-02-01':'2010-03-31'].index)
+    stats = ['count', 'sum', 'mean', 'min', 'max', 'std', 'var']
+    gappy_rollup = Rollup(gappy, ['D', 'ME'])
+    same = all(np.allclose(gappy.resample(freq).agg(stats).to_numpy(dtype=float),
+                           gappy_rollup.agg(freq, stats).to_numpy(dtype=float), equal_nan=True)
+               for freq in ['D', 'ME'])
+    print(f"Two missing months, all statistics match resample: {same}")
@@ -7,6 +7,11 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from datetime import datetime, timedelta
 
+from climatology import Climatology
+from rolling_stats import RollingStats
+from rollup import Rollup
+from year_pivot import year_pivot
+
 # Generate sample data for 3 years of daily temperatures
 # -----------------------------------------------------------------------------
 np.random.seed(42)  # For reproducible results
@@ -86,20 +91,25 @@ print("=" * 70)
 # Downsampling - Reducing frequency (e.g., daily to monthly)
 print("Downsampling examples:")
 
+# Each resample() call groups every row again. A Rollup groups the rows once
+# (by day here) and builds the weekly, monthly, quarterly and yearly numbers
+# from those daily partial results - same values as resample()
+rollup = Rollup(weather_df, freqs=['W', 'ME', 'QE', 'YE'])
+
 # Monthly averages
-monthly_avg = weather_df.resample('M').mean()
+monthly_avg = rollup.mean('ME')  # same as weather_df.resample('ME').mean()
 print("\nMonthly averages:")
 print(monthly_avg.head())
 
 # Quarterly statistics
-quarterly_stats = weather_df.resample('Q').agg({
+quarterly_stats = rollup.agg('QE', {
     'temperature': ['min', 'mean', 'max', 'std']
 })
 print("\nQuarterly statistics:")
 print(quarterly_stats.head())
 
 # Annual statistics
-yearly_stats = weather_df.resample('Y').agg({
+yearly_stats = rollup.agg('YE', {
     'temperature': ['min', 'mean', 'max', 'std', 'count']
 })
 print("\nYearly statistics:")
@@ -109,7 +119,7 @@ print(yearly_stats)
 print("\nUpsampling examples:")
 
 # Create a small dataset with weekly data
-weekly_data = weather_df.resample('W').mean()
+weekly_data = rollup.mean('W')
 print("\nWeekly data (original):")
 print(weekly_data.head())
 
@@ -155,9 +165,14 @@ print("Plot saved as 'temperature_timeseries.png'")
 plt.figure(figsize=(12, 8))
 
 # Calculate various time series derived from the original data
-weather_df['temp_7d_avg'] = weather_df['temperature'].rolling(window=7).mean()
-weather_df['temp_90d_avg'] = weather_df['temperature'].rolling(window=90).mean()
-weather_df['temp_365d_avg'] = weather_df['temperature'].rolling(window=365).mean()
+# One RollingStats object keeps the 7, 90 and 365-day windows together; when
+# a new day arrives, rolling_temps.append(temp) updates all three averages
+# without recomputing the history
+rolling_temps = RollingStats(windows=(7, 90, 365), stats=('mean',))
+rolling_avgs = rolling_temps.extend(weather_df['temperature'])
+weather_df['temp_7d_avg'] = rolling_avgs['mean_7']
+weather_df['temp_90d_avg'] = rolling_avgs['mean_90']
+weather_df['temp_365d_avg'] = rolling_avgs['mean_365']
 
 # Subplot 1: Original data with trend
 plt.subplot(3, 1, 1)
@@ -193,30 +208,28 @@ plt.savefig('temperature_trends_subplots.png')
 
 print("Plot saved as 'temperature_trends_subplots.png'")
 
+# A new day of data: update the moving averages in place
+new_day_temp = weather_df['temperature'].iloc[-1] + 0.5
+latest = rolling_temps.append(new_day_temp)
+print(f"New day ({new_day_temp:.1f}°C) -> 7-day avg {latest['mean_7']:.2f}, "
+      f"90-day avg {latest['mean_90']:.2f}, 365-day avg {latest['mean_365']:.2f}")
+
 # 3. Seasonal subseries plot
 plt.figure(figsize=(14, 8))
 
-# Calculate monthly averages
-monthly_avg = weather_df.resample('M').mean()
-
-# Create a column for month name
-monthly_avg['month'] = monthly_avg.index.month_name()
-
-# Create a column for year
-monthly_avg['year'] = monthly_avg.index.year
+# Monthly averages as a (year x month) matrix: each column is one month
+# across all years
+by_month = year_pivot(weather_df['temperature'], by='month')
 
 # Group by month
-for i, month in enumerate(pd.date_range(start='2020-01-01', periods=12, freq='M').month_name()):
+for i, month in enumerate(pd.date_range(start='2020-01-01', periods=12, freq='ME').month_name()):
     plt.subplot(3, 4, i+1)
     
-    # Get data for this month across all years
-    month_data = monthly_avg[monthly_avg['month'] == month]
-    
-    # Plot each year's value
-    plt.plot(month_data['year'], month_data['temperature'], 'o-')
+    # Plot each year's value for this month
+    plt.plot(by_month.index, by_month[i + 1], 'o-')
     
     plt.title(month)
-    plt.ylim(min(monthly_avg['temperature'])-1, max(monthly_avg['temperature'])+1)
+    plt.ylim(np.nanmin(by_month.values)-1, np.nanmax(by_month.values)+1)
     
     # Only show y-axis label for leftmost plots
     if i % 4 == 0:
@@ -238,12 +251,8 @@ print("Plot saved as 'seasonal_subseries.png'")
 # 4. Heatmap of temperature by month and year
 plt.figure(figsize=(12, 8))
 
-# Pivot the data to create a matrix with months as rows and years as columns
-heatmap_data = monthly_avg.pivot_table(
-    index=monthly_avg.index.month,
-    columns=monthly_avg.index.year,
-    values='temperature'
-)
+# Turn the (year x month) matrix around: months as rows and years as columns
+heatmap_data = by_month.T
 
 # Create month labels
 month_labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
@@ -276,15 +285,11 @@ print("Plot saved as 'temperature_heatmap.png'")
 # 5. Year-over-year comparison
 plt.figure(figsize=(12, 6))
 
-# Reindex by day of year to compare annual cycles
-years = sorted(weather_df.index.year.unique())
-for year in years:
-    # Get data for this year and reindex by day of year
-    year_data = weather_df[weather_df.index.year == year].copy()
-    year_data['dayofyear'] = year_data.index.dayofyear
-    
+# One row per year, one column per day of year (built in one pass)
+by_day = year_pivot(weather_df['temperature'], by='dayofyear')
+for year, year_data in by_day.iterrows():
     # Plot the data
-    plt.plot(year_data['dayofyear'], year_data['temperature'], alpha=0.7, label=str(year))
+    plt.plot(by_day.columns, year_data, alpha=0.7, label=str(year))
 
 plt.xlabel('Day of Year')
 plt.ylabel('Temperature (°C)')
@@ -304,16 +309,17 @@ print("Plot saved as 'year_over_year_comparison.png'")
 plt.figure(figsize=(12, 6))
 
 # Calculate the mean and standard deviation for each day of year
+# (one pass over the data; see climatology.py)
 weather_df['dayofyear'] = weather_df.index.dayofyear
-daily_means = weather_df.groupby('dayofyear')['temperature'].mean()
-daily_stds = weather_df.groupby('dayofyear')['temperature'].std()
+normals = Climatology(weather_df.index, weather_df['temperature'], leap='dayofyear', fill=False)
+daily = normals.frame[normals.frame['count'] > 0]
 
 # Create a dataframe with the expected range for each date
 expected_range = pd.DataFrame({
-    'mean': daily_means,
-    'lower': daily_means - 2 * daily_stds,
-    'upper': daily_means + 2 * daily_stds
-}, index=daily_means.index)
+    'mean': daily['mean'],
+    'lower': daily['mean'] - 2 * daily['std'],
+    'upper': daily['mean'] + 2 * daily['std']
+}, index=daily.index)
 
 # Plot the expected range
 plt.fill_between(expected_range.index, expected_range['lower'], expected_range['upper'], 
@@ -326,11 +332,9 @@ plt.plot(expected_range.index, expected_range['mean'], 'b--', label='Mean')
 year_2022 = weather_df[weather_df.index.year == 2022].copy()
 plt.plot(year_2022['dayofyear'], year_2022['temperature'], 'r-', label='2022 Data')
 
-# Highlight anomalies (points outside the expected range)
-anomalies = year_2022[
-    (year_2022['temperature'] < expected_range.loc[year_2022['dayofyear']]['lower'].values) | 
-    (year_2022['temperature'] > expected_range.loc[year_2022['dayofyear']]['upper'].values)
-]
+# Highlight anomalies (points outside the expected range), looked up for
+# every 2022 day at once
+anomalies = year_2022[normals.anomalies(year_2022.index, year_2022['temperature'], k=2)]
 
 plt.scatter(anomalies['dayofyear'], anomalies['temperature'], color='red', s=50,
            edgecolor='black', label='Anomalies')
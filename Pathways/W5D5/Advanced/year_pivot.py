@@ -0,0 +1,204 @@
+# Year Pivot - one row per year, one column per day (or month) of the year
+# Time Series Basics - Session 2
+#
+# Year-over-year plots usually loop over the years:
+#     for year in years:
+#         year_data = weather_df[weather_df.index.year == year].copy()
+# which scans (and copies) the whole series once per year, and heatmaps use
+# a groupby([year, month]).mean().unstack().
+#
+# year_pivot() reshapes the series into a dense (years x days) or
+# (years x months) matrix in a single pass:
+#   - every reading gets a row (its year minus the first year) and a column
+#     (its day slot, month or hour of the year), so row * columns + column is
+#     its cell in the flattened matrix
+#   - np.bincount adds up the readings and counts for all cells at once, so
+#     hourly data is averaged into days (or months) on the way
+#   - cells without readings (missing years, Feb 29 in common years, a
+#     record that starts in June) stay NaN
+# Each year is then a row: pivot.loc[2022] is that year's annual cycle and
+# pivot.T is ready for plt.imshow.
+#
+# For long records the matrix can be written straight into a .npy file and
+# opened again with load_pivot(), which memory-maps it instead of reading it.
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from climatology import day_slots
+
+LAYOUTS = {'dayofyear': 366, 'month': 12, 'hourofyear': 366 * 24}
+AGGREGATIONS = ('mean', 'sum', 'min', 'max', 'count')
+
+# First column of each month (and the end of December) in the 'align'
+# day-of-year layout, where every month starts in the same column each year
+MONTH_STARTS = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335, 366])
+
+
+def _cells(index, by, leap):
+    """Year of every reading and its column in the chosen layout"""
+    days = index.to_numpy().astype('datetime64[D]')
+    day_numbers = days.view(np.int64)
+    first = day_numbers.min()
+    calendar = pd.DatetimeIndex(np.arange(first, day_numbers.max() + 1).astype('datetime64[D]'))
+    offsets = day_numbers - first
+    years = calendar.year.to_numpy()[offsets]
+    if by == 'month':
+        columns = calendar.month.to_numpy()[offsets] - 1
+    else:
+        columns = day_slots(index, leap)
+        if by == 'hourofyear':
+            hours = (index.to_numpy().astype('datetime64[h]') - days).astype(np.int64)
+            columns = columns * 24 + hours
+    return years, columns
+
+
+def _column_labels(by):
+    if by == 'hourofyear':
+        return pd.RangeIndex(0, LAYOUTS[by], name=by)
+    return pd.RangeIndex(1, LAYOUTS[by] + 1, name=by)
+
+
+def year_pivot(series, by='dayofyear', how='mean', leap='dayofyear', path=None,
+               dtype=np.float64):
+    """Reshape a time series into a (years x columns) matrix in one pass
+
+    Args:
+        series: Series with a DatetimeIndex (e.g. weather_df['temperature'])
+        by: 'dayofyear' (366 columns), 'month' (12) or 'hourofyear' (8784)
+        how: How readings in the same cell are combined: 'mean', 'sum',
+             'min', 'max' or 'count'
+        leap: Day numbering for 'dayofyear'/'hourofyear' - see climatology.py.
+              'dayofyear' matches index.dayofyear; 'align' puts every calendar
+              day in the same column each year (Feb 29 is NaN in common years)
+        path: Optional .npy file; the matrix is written there through a
+              memory map instead of being kept in memory
+        dtype: dtype of the matrix (float32 halves the size of long records)
+
+    Returns:
+        DataFrame indexed by year (every year from the first to the last)
+        with one column per day, month or hour, NaN where there is no data
+    """
+    if by not in LAYOUTS:
+        raise ValueError(f"by must be one of {list(LAYOUTS)}")
+    if how not in AGGREGATIONS:
+        raise ValueError(f"how must be one of {AGGREGATIONS}")
+    index = pd.DatetimeIndex(series.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    values = np.asarray(series, dtype=np.float64)
+    keep = ~np.isnan(values)
+    index, values = index[keep], values[keep]
+
+    n_columns = LAYOUTS[by]
+    if len(values):
+        years, columns = _cells(index, by, leap)
+        first_year = int(years.min())
+        n_years = int(years.max()) - first_year + 1
+        cells = (years - first_year) * n_columns + columns
+    else:
+        first_year, n_years, cells = 0, 0, np.array([], dtype=np.int64)
+    size = n_years * n_columns
+
+    # The single pass: every cell's statistic from all of its readings
+    with np.errstate(invalid='ignore', divide='ignore'):
+        counts = np.bincount(cells, minlength=size)
+        if how == 'count':
+            flat = counts.astype(np.float64)
+        elif how in ('mean', 'sum'):
+            flat = np.bincount(cells, weights=values, minlength=size)
+            if how == 'mean':
+                flat /= counts
+            else:
+                flat[counts == 0] = np.nan
+        else:
+            flat = np.full(size, np.nan)
+            (np.fmin if how == 'min' else np.fmax).at(flat, cells, values)
+
+    if path is None:
+        matrix = flat.reshape(n_years, n_columns).astype(dtype, copy=False)
+    else:
+        matrix = np.lib.format.open_memmap(path, mode='w+', dtype=dtype,
+                                           shape=(n_years, n_columns))
+        matrix[:] = flat.reshape(n_years, n_columns)
+        matrix.flush()
+        with open(path + '.json', 'w') as f:
+            json.dump({'first_year': first_year, 'by': by, 'how': how, 'leap': leap}, f)
+
+    return pd.DataFrame(matrix, index=pd.RangeIndex(first_year, first_year + n_years, name='year'),
+                        columns=_column_labels(by), copy=False)
+
+
+def load_pivot(path, mode='r'):
+    """Open a matrix saved by year_pivot(path=...) without reading it into memory
+
+    Args:
+        path: The .npy file
+        mode: 'r' (read-only) or 'r+' (changes are written back to the file)
+    """
+    with open(path + '.json') as f:
+        info = json.load(f)
+    matrix = np.load(path, mmap_mode=mode)
+    first_year = info['first_year']
+    return pd.DataFrame(matrix, index=pd.RangeIndex(first_year, first_year + matrix.shape[0], name='year'),
+                        columns=_column_labels(info['by']), copy=False)
+
+
+if __name__ == "__main__":
+    import mmap
+    import os
+    import tempfile
+    import time
+
+    def backed_by_file(array):
+        """True if the array's memory comes from a memory-mapped file"""
+        while array is not None:
+            if isinstance(array, (np.memmap, mmap.mmap)):
+                return True
+            array = getattr(array, 'base', None)
+        return False
+
+    # Forty years of hourly temperatures
+    rng = np.random.default_rng(42)
+    index = pd.date_range('1985-01-01', '2024-12-31 23:00', freq='h')
+    hours = np.arange(len(index))
+    temps = pd.Series(12 - 10 * np.cos(2 * np.pi * hours / (365.25 * 24))
+                      + rng.normal(0, 3, len(index)), index=index)
+    temps.iloc[rng.choice(len(index), 5000, replace=False)] = np.nan
+    print(f"{len(temps):,} hourly readings, {index.year.nunique()} years")
+
+    start = time.perf_counter()
+    looped = {}
+    for year in sorted(temps.index.year.unique()):
+        year_data = temps[temps.index.year == year].copy()
+        looped[year] = year_data.groupby(year_data.index.dayofyear).mean()
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    grouped = temps.groupby([temps.index.year, temps.index.month]).mean().unstack()
+    groupby_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    by_day = year_pivot(temps, by='dayofyear')
+    by_month = year_pivot(temps, by='month')
+    pivot_time = time.perf_counter() - start
+
+    print(f"Per-year filter + groupby:            {loop_time:.2f}s")
+    print(f"groupby([year, month]).unstack():     {groupby_time:.2f}s")
+    print(f"year_pivot, both layouts:             {pivot_time:.2f}s")
+    same_days = all(np.allclose(by_day.loc[year, rows.index], rows) for year, rows in looped.items())
+    print(f"Day-of-year rows match the per-year loop: {same_days}")
+    print(f"Month matrix matches groupby: {np.allclose(by_month, grouped)}")
+    print(f"Feb 29 is NaN in common years ('align'): "
+          f"{np.isnan(year_pivot(temps, leap='align').loc[2023, 60])}")
+
+    # The hourly layout written to disk and memory-mapped back
+    path = os.path.join(tempfile.mkdtemp(), 'hourly.npy')
+    by_hour = year_pivot(temps, by='hourofyear', path=path, dtype=np.float32)
+    reopened = load_pivot(path)
+    print(f"Hour-of-year matrix {reopened.shape}, {os.path.getsize(path) / 1024 / 1024:.1f} MB on disk, "
+          f"memory-mapped: {backed_by_file(reopened.to_numpy())}")
+    print(f"Reopened copy matches: {np.allclose(reopened, by_hour, equal_nan=True)}")
+    print(by_month.round(1).tail(3))
@@ -5,12 +5,20 @@
 INSTRUCTOR VERSION: This file contains complete solutions for the breakout session exercises.
 """
 
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import matplotlib.dates as mdates
 
+# calendar_features.py and year_pivot.py live in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from calendar_features import season_of
+from year_pivot import MONTH_STARTS, year_pivot
+
 # -----------------------------------------------------------------------------
 # Exercise 1: Load and Prepare the Weather Data
 # -----------------------------------------------------------------------------
@@ -85,19 +93,11 @@ print("Monthly averages (first 5 months):")
 print(monthly_data.head())
 
 # 2. Calculate seasonal statistics
-# Define a function to assign seasons based on month
-def assign_season(month):
-    if month in [12, 1, 2]:
-        return 'Winter'
-    elif month in [3, 4, 5]:
-        return 'Spring'
-    elif month in [6, 7, 8]:
-        return 'Summer'
-    else:
-        return 'Fall'
-
+# Seasons by month: Dec-Feb Winter, Mar-May Spring, Jun-Aug Summer, Sep-Nov Fall
+# season_of() looks every month up in one array instead of calling a
+# function per row (see Advanced/calendar_features.py)
 # Add a season column
-weather_data['season'] = weather_data.index.map(lambda x: assign_season(x.month))
+weather_data['season'] = season_of(weather_data.index)
 
 # Calculate seasonal statistics
 seasonal_stats = weather_data.groupby('season').agg({
@@ -208,22 +208,22 @@ plt.savefig('temp_humidity_scatter.png')
 # 1. Create a plot comparing the same months across different years
 plt.figure(figsize=(14, 8))
 
-# Get unique years in the dataset
-years = sorted(weather_data.index.year.unique())
+# One row per year, one column per calendar day ('align' keeps each month in
+# the same columns every year; Feb 29 is empty in common years)
+by_day = year_pivot(weather_data['temperature'], by='dayofyear', leap='align')
+years = list(by_day.index)
 
 # Create a subplot for each month
 for i, month in enumerate(range(1, 13)):
     ax = plt.subplot(3, 4, i + 1)
     
+    # This month's columns of the matrix
+    month_days = by_day.iloc[:, MONTH_STARTS[i]:MONTH_STARTS[i + 1]]
+    days_of_month = np.arange(1, month_days.shape[1] + 1)
+    
     # Plot each year's data for this month
     for year in years:
-        # Filter data for this month and year
-        month_data = weather_data[(weather_data.index.month == month) & 
-                                 (weather_data.index.year == year)]
-        
-        # Plot the data
-        days_of_month = month_data.index.day
-        plt.plot(days_of_month, month_data['temperature'], label=str(year))
+        plt.plot(days_of_month, month_days.loc[year], label=str(year))
     
     # Add title and labels
     plt.title(month_names[i])
@@ -250,9 +250,8 @@ plt.savefig('year_over_year.png')
 # 2. Create a heatmap of average temperatures by month and year
 plt.figure(figsize=(12, 8))
 
-# Create a pivot table with months as rows and years as columns
-pivot_data = weather_data['temperature'].groupby([weather_data.index.year, 
-                                                 weather_data.index.month]).mean().unstack()
+# Months as rows and years as columns (the year x month matrix turned around)
+pivot_data = year_pivot(weather_data['temperature'], by='month').T
 
 # Create a heatmap
 plt.imshow(pivot_data, aspect='auto', cmap='viridis')
@@ -9,25 +9,32 @@ BREAKOUT GOALS:
 4. Identify relationships between different weather measurements
 """
 
-import pandas as pd
+import os
+import sys
+
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import matplotlib.dates as mdates
 import seaborn as sns
 
+# typed_loader.py lives in the W5D4 Advanced folder, calendar_features.py in ours
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'W5D4', 'Advanced'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from calendar_features import season_of
+from typed_loader import load_csv
+
 # -----------------------------------------------------------------------------
 # Exercise 1: Load and Prepare the Weather Data
 # -----------------------------------------------------------------------------
 # Time series data requires proper datetime formatting to enable time-based operations
 
 # Load the dataset
-weather_data = pd.read_csv('weather_data.csv')
-
-# Convert the date column to datetime and set it as the index
+# The date column is parsed to datetime while the file is read and set as
+# the index; measurements are float32. The typed copy is cached, so the next
+# run skips parsing the CSV.
 # Discussion point: Why is datetime formatting critical for time series analysis?
-weather_data['date'] = pd.to_datetime(weather_data['date'])
-weather_data.set_index('date', inplace=True)
+weather_data = load_csv('weather_data.csv', index_col='date', report=True)
 
 # Examine the data
 print("Dataset overview:")
@@ -53,19 +60,11 @@ print("Monthly averages (first 5 months):")
 print(monthly_data.head())
 
 # 2. Calculate seasonal statistics
-# Define a function to assign seasons based on month
-def assign_season(month):
-    if month in [12, 1, 2]:
-        return 'Winter'
-    elif month in [3, 4, 5]:
-        return 'Spring'
-    elif month in [6, 7, 8]:
-        return 'Summer'
-    else:
-        return 'Fall'
-
+# Seasons by month: Dec-Feb Winter, Mar-May Spring, Jun-Aug Summer, Sep-Nov Fall
+# season_of() looks every month up in one array instead of calling a
+# function per row (see Advanced/calendar_features.py)
 # Add a season column
-weather_data['season'] = weather_data.index.month.map(assign_season)
+weather_data['season'] = season_of(weather_data.index)
 
 # Calculate seasonal statistics
 # Discussion point: How does multi-level aggregation help analyze complex patterns?
@@ -1,5 +1,5 @@
 -- Working Standard Deviation Query for SQLite
--- This version uses a simpler but mathematically equivalent approach
+-- This version computes the mean first, then the spread around it
 
 SELECT 
     wr.reading_date,
@@ -23,20 +23,32 @@ FROM weather_readings wr
 JOIN weather_stations ws ON wr.station_id = ws.station_id
 JOIN locations l ON ws.location_id = l.location_id
 JOIN (
-    -- Calculate statistics using variance formula: VAR = AVG(x²) - AVG(x)²
+    -- Calculate statistics in two steps: first the mean, then the average
+    -- squared distance from that mean. The shortcut AVG(x²) - AVG(x)² is
+    -- mathematically equivalent but loses precision when values are large
+    -- compared to their spread.
     SELECT 
         l2.city,
         COUNT(*) as reading_count,
-        AVG(wr2.temperature) AS avg_temp,
+        city_means.avg_temp,
         -- Standard deviation = SQRT(variance)
-        -- Variance = (sum of squares / n) - (mean)²
+        -- Variance = average of (x - mean)²
         SQRT(
-            AVG(wr2.temperature * wr2.temperature) - 
-            (AVG(wr2.temperature) * AVG(wr2.temperature))
+            AVG((wr2.temperature - city_means.avg_temp) * 
+                (wr2.temperature - city_means.avg_temp))
         ) AS std_dev
     FROM weather_readings wr2
     JOIN weather_stations ws2 ON wr2.station_id = ws2.station_id
     JOIN locations l2 ON ws2.location_id = l2.location_id
+    JOIN (
+        SELECT 
+            l3.city,
+            AVG(wr3.temperature) AS avg_temp
+        FROM weather_readings wr3
+        JOIN weather_stations ws3 ON wr3.station_id = ws3.station_id
+        JOIN locations l3 ON ws3.location_id = l3.location_id
+        GROUP BY l3.city
+    ) city_means ON l2.city = city_means.city
     GROUP BY l2.city
     HAVING COUNT(*) > 1
 ) city_stats ON l.city = city_stats.city
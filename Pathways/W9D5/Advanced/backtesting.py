@@ -0,0 +1,406 @@
+"""
+Rolling-Origin Backtesting for Weather Forecasting Models
+
+time_series_forecasting.py compares its models on ONE train/test split, so
+the ranking depends on which six months happen to be in the test set.
+A backtest repeats the comparison from many forecast origins:
+
+    fold 1: train on days    0-364, forecast days 365-394
+    fold 2: train on days    0-424, forecast days 425-454   (expanding window)
+       or   train on days   60-424, forecast days 425-454   (sliding window)
+    ...
+
+Every (fold, model) pair is an independent fit, so with n_jobs > 1 the grid
+is run in a process pool: the data is sent to each worker process once, the
+tasks only carry row numbers, and the largest folds are started first so the
+cores finish together. With N cores the wall-clock time drops to roughly 1/N.
+The workers are started the platform's default way, which on Windows and
+macOS re-imports the calling script - a script using n_jobs > 1 must keep
+its top-level code under `if __name__ == "__main__":` (as the demo below
+does). The default, n_jobs=1, runs everything in the calling process.
+
+Forecasts only use data up to the origin. The regression models need lags
+of the temperature, so they forecast recursively (recursive_forecast.py):
+each prediction becomes the next day's lag, as it would for a real 30-day
+forecast, instead of being fed the actual temperatures of the test days.
+
+Fitted models are cached on disk per fold (keyed by the model's settings,
+the fold's rows and a fingerprint of the data), so running the backtest again
+- e.g. after adding one model - only fits what is new.
+
+Errors are then summarized by model, by horizon (days after the origin) and
+by season of the forecast day.
+"""
+
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+# calendar_features.py lives in the W5D5 Advanced folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'W5D5', 'Advanced'))
+from calendar_features import season_of
+
+from recursive_forecast import RecursiveForecaster
+
+# Rows [train_start, train_stop) are used for fitting, [train_stop, test_stop)
+# are forecast
+Fold = namedtuple('Fold', ['number', 'train_start', 'train_stop', 'test_stop'])
+
+
+# Forecasters
+# -----------
+# Each one has fit(train, target) and predict(test). They are small classes
+# (not closures) so they can be sent to worker processes and cached.
+
+class Forecaster:
+    """Base class; the repr lists the settings and is used in cache keys"""
+
+    def __repr__(self):
+        settings = ', '.join(f"{k}={v!r}" for k, v in vars(self).items() if not k.endswith('_'))
+        return f"{type(self).__name__}({settings})"
+
+
+class MovingAverage(Forecaster):
+    """Forecast the mean of the last `window` training values"""
+
+    def __init__(self, window=7):
+        self.window = window
+
+    def fit(self, train, target):
+        self.level_ = train[target].iloc[-self.window:].mean()
+        return self
+
+    def predict(self, test):
+        return np.full(len(test), self.level_)
+
+
+class SimpleExpSmoothing(Forecaster):
+    """Forecast the last value of the exponentially weighted moving average"""
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+
+    def fit(self, train, target):
+        self.level_ = train[target].ewm(alpha=self.alpha).mean().iloc[-1]
+        return self
+
+    def predict(self, test):
+        return np.full(len(test), self.level_)
+
+
+class HoltWinters(Forecaster):
+    """Holt-Winters with additive trend and season (trend only if that fails)"""
+
+    def __init__(self, seasonal_periods=30):
+        self.seasonal_periods = seasonal_periods
+
+    def fit(self, train, target):
+        series = train[target].reset_index(drop=True)
+        try:
+            model = ExponentialSmoothing(series, seasonal_periods=self.seasonal_periods,
+                                         trend='add', seasonal='add', use_boxcox=False)
+            self.fit_ = model.fit()
+        except ValueError:
+            model = ExponentialSmoothing(series, trend='add', seasonal=None, use_boxcox=False)
+            self.fit_ = model.fit()
+        return self
+
+    def predict(self, test):
+        return np.asarray(self.fit_.forecast(steps=len(test)))
+
+
+class Arima(Forecaster):
+    """ARIMA(p, d, q); falls back to a 7-day moving average if fitting fails"""
+
+    def __init__(self, order=(5, 1, 0)):
+        self.order = order
+
+    def fit(self, train, target):
+        series = train[target].reset_index(drop=True)
+        try:
+            self.fit_ = ARIMA(series, order=self.order).fit()
+        except Exception:
+            self.fit_ = MovingAverage(7).fit(train, target)
+        return self
+
+    def predict(self, test):
+        if isinstance(self.fit_, MovingAverage):
+            return self.fit_.predict(test)
+        return np.asarray(self.fit_.forecast(steps=len(test)))
+
+
+class Regressor(Forecaster):
+    """A scikit-learn model on lag/calendar features, forecasting recursively
+
+    The features must be ones RecursiveForecaster can rebuild ('month',
+    'day_sin', 'temp_lag1', 'temp_ma7', ...). Only the training data is used
+    at forecast time: the test rows' own feature columns hold actual
+    temperatures from after the origin and are ignored.
+    """
+
+    def __init__(self, estimator, features):
+        self.estimator = estimator
+        self.features = list(features)
+
+    def fit(self, train, target):
+        self.model_ = clone(self.estimator).fit(train[self.features], train[target])
+        self.forecaster_ = RecursiveForecaster(self.model_, self.features)
+        self.history_ = train[target].to_numpy(dtype=np.float64)[-self.forecaster_.size:]
+        self.origin_ = train.index[-1]
+        self.freq_ = train.index.freq or 'D'
+        return self
+
+    def predict(self, test):
+        return self.forecaster_.forecast(self.history_, self.origin_, len(test), freq=self.freq_)
+
+
+# Folds
+# -----
+
+def rolling_origin_folds(n_rows, initial, horizon, step=None, window=None):
+    """Train/test row ranges for a rolling-origin backtest
+
+    Args:
+        n_rows: Rows in the data
+        initial: Training rows in the first fold
+        horizon: Rows forecast from each origin
+        step: Rows the origin moves between folds (default: horizon)
+        window: None for an expanding window (all rows up to the origin);
+                a number for a sliding window of that many training rows
+
+    Returns:
+        List of Fold(number, train_start, train_stop, test_stop)
+    """
+    step = step or horizon
+    folds = []
+    for number, origin in enumerate(range(initial, n_rows - horizon + 1, step), start=1):
+        start = 0 if window is None else max(0, origin - window)
+        folds.append(Fold(number, start, origin, origin + horizon))
+    return folds
+
+
+# Running the grid
+# ----------------
+
+_DATA = None  # the data in each worker process, set once by _init_worker
+
+
+def _init_worker(data):
+    global _DATA
+    _DATA = data
+
+
+def _fingerprint(data):
+    """Short hash of the data's index and values, for cache keys"""
+    hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    return hashlib.md5(hashed.tobytes()).hexdigest()[:12]
+
+
+def _run_task(task):
+    """Fit (or load) one model on one fold and forecast the fold's test rows"""
+    name, forecaster, fold, target, cache_file = task
+    start = time.perf_counter()
+    train = _DATA.iloc[fold.train_start:fold.train_stop]
+    test = _DATA.iloc[fold.train_stop:fold.test_stop]
+    cached = cache_file is not None and os.path.exists(cache_file)
+    if cached:
+        fitted = joblib.load(cache_file)
+    else:
+        fitted = clone_forecaster(forecaster).fit(train, target)
+        if cache_file is not None:
+            joblib.dump(fitted, cache_file)
+    predictions = np.asarray(fitted.predict(test), dtype=np.float64)
+    return name, fold, predictions, time.perf_counter() - start, cached
+
+
+def clone_forecaster(forecaster):
+    """A fresh, unfitted copy with the same settings"""
+    return type(forecaster)(**{k: v for k, v in vars(forecaster).items() if not k.endswith('_')})
+
+
+class Backtest:
+    """Fit every model on every fold in parallel and collect the forecasts
+
+    Example:
+        models = {'Moving Average': MovingAverage(7),
+                  'Random Forest': Regressor(RandomForestRegressor(), features)}
+        backtest = Backtest(df, models, initial=365, horizon=30)
+        backtest.run()
+        backtest.metrics(by='horizon')
+    """
+
+    def __init__(self, data, models, initial, horizon, step=None, window=None,
+                 target='temperature', n_jobs=1, cache_dir=None):
+        """
+        Args:
+            data: DataFrame with a DatetimeIndex, the target and any features
+            models: {name: forecaster}
+            initial, horizon, step, window: See rolling_origin_folds()
+            target: Column being forecast
+            n_jobs: Worker processes; 1 (the default) runs in this process,
+                    None uses all cores (see the module docstring)
+            cache_dir: Folder for fitted models (None: no caching). The files
+                       are unpickled when loaded, so use a folder only you
+                       can write to.
+        """
+        self.data = data
+        self.models = dict(models)
+        self.target = target
+        self.folds = rolling_origin_folds(len(data), initial, horizon, step, window)
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.results = None
+        self.timings = None
+
+    def _tasks(self):
+        key = _fingerprint(self.data) if self.cache_dir else None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        tasks = []
+        for fold in self.folds:
+            for name, forecaster in self.models.items():
+                cache_file = None
+                if self.cache_dir:
+                    digest = hashlib.md5(f"{forecaster!r}|{key}|{fold.train_start}|"
+                                         f"{fold.train_stop}|{self.target}".encode()).hexdigest()[:16]
+                    cache_file = os.path.join(self.cache_dir, f"{digest}.joblib")
+                tasks.append((name, forecaster, fold, self.target, cache_file))
+        # Largest training sets first, so no core is left with a big fit at the end
+        return sorted(tasks, key=lambda t: t[2].train_stop - t[2].train_start, reverse=True)
+
+    def run(self):
+        """Run the folds x models grid
+
+        Returns:
+            Long DataFrame: one row per model, fold and forecast day with
+            'model', 'fold', 'origin', 'date', 'horizon', 'actual',
+            'predicted' and 'season' columns
+        """
+        tasks = self._tasks()
+        if self.n_jobs == 1:
+            _init_worker(self.data)
+            outputs = [_run_task(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                     initargs=(self.data,)) as pool:
+                outputs = list(pool.map(_run_task, tasks))
+
+        actual = self.data[self.target].to_numpy(dtype=np.float64)
+        frames, timings = [], []
+        for name, fold, predictions, seconds, cached in outputs:
+            rows = np.arange(fold.train_stop, fold.test_stop)
+            frames.append(pd.DataFrame({
+                'model': name,
+                'fold': fold.number,
+                'origin': self.data.index[fold.train_stop - 1],
+                'date': self.data.index[rows],
+                'horizon': np.arange(1, len(rows) + 1),
+                'actual': actual[rows],
+                'predicted': predictions,
+            }))
+            timings.append({'model': name, 'fold': fold.number, 'seconds': seconds, 'cached': cached})
+
+        results = pd.concat(frames, ignore_index=True)
+        results['model'] = pd.Categorical(results['model'], categories=list(self.models))
+        results['season'] = season_of(pd.DatetimeIndex(results['date']))
+        self.results = results.sort_values(['model', 'fold', 'horizon'], ignore_index=True)
+        self.timings = pd.DataFrame(timings)
+        return self.results
+
+    def metrics(self, by=None):
+        """MAE, RMSE and MAPE per model, optionally split by 'horizon' or 'season'"""
+        if self.results is None:
+            raise RuntimeError("Call run() first")
+        keys = ['model'] + ([by] if by else [])
+        return summarize(self.results, keys)
+
+
+def summarize(results, keys=('model',)):
+    """Error metrics for every group of a backtest results frame, vectorized"""
+    errors = results['predicted'].to_numpy() - results['actual'].to_numpy()
+    frame = results[list(keys)].assign(
+        abs_error=np.abs(errors),
+        squared_error=errors ** 2,
+        pct_error=np.abs(errors) / np.abs(results['actual'].to_numpy() + 1e-10) * 100,
+    )
+    grouped = frame.groupby(list(keys), observed=True)
+    means = grouped[['abs_error', 'squared_error', 'pct_error']].mean()
+    return pd.DataFrame({
+        'MAE': means['abs_error'],
+        'RMSE': np.sqrt(means['squared_error']),
+        'MAPE': means['pct_error'],
+        'n': grouped.size(),
+    })
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import warnings
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+
+    warnings.filterwarnings('ignore')  # statsmodels convergence messages
+
+    # Three years of daily data with the features used in the examples
+    rng = np.random.default_rng(42)
+    dates = pd.date_range('2021-01-01', '2023-12-31', freq='D')
+    day = (dates.dayofyear.to_numpy() - 1) / 365
+    df = pd.DataFrame({'temperature': 15 - 15 * np.cos(2 * np.pi * day) + rng.normal(0, 3, len(dates))},
+                      index=dates)
+    df['month'] = dates.month
+    df['day_sin'], df['day_cos'] = np.sin(2 * np.pi * day), np.cos(2 * np.pi * day)
+    df['temp_lag1'] = df['temperature'].shift(1)
+    df['temp_lag7'] = df['temperature'].shift(7)
+    df['temp_ma7'] = df['temperature'].rolling(7).mean()
+    df = df.dropna()
+    features = ['month', 'day_sin', 'day_cos', 'temp_lag1', 'temp_lag7', 'temp_ma7']
+
+    models = {
+        'Moving Average': MovingAverage(7),
+        'Simple Exp Smoothing': SimpleExpSmoothing(0.3),
+        'Holt-Winters': HoltWinters(30),
+        'ARIMA': Arima((5, 1, 0)),
+        'Linear Regression': Regressor(LinearRegression(), features),
+        'Random Forest': Regressor(RandomForestRegressor(n_estimators=50, random_state=42), features),
+    }
+    cache_dir = tempfile.mkdtemp()
+    cores = os.cpu_count() or 1
+
+    for n_jobs in sorted({1, cores}):
+        shutil.rmtree(cache_dir)
+        backtest = Backtest(df, models, initial=365, horizon=30, step=60, n_jobs=n_jobs, cache_dir=cache_dir)
+        start = time.perf_counter()
+        backtest.run()
+        print(f"{len(backtest.folds)} folds x {len(models)} models, {n_jobs} process(es): "
+              f"{time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    again = Backtest(df, models, initial=365, horizon=30, step=60, n_jobs=cores, cache_dir=cache_dir)
+    again.run()
+    print(f"Again with every fold cached: {time.perf_counter() - start:.1f}s "
+          f"({int(again.timings['cached'].sum())} of {len(again.timings)} fits loaded)")
+    print(f"Same forecasts from the cache: "
+          f"{np.allclose(again.results['predicted'], backtest.results['predicted'])}")
+    shutil.rmtree(cache_dir)
+
+    sliding = rolling_origin_folds(len(df), initial=365, horizon=30, step=60, window=365)
+    print(f"Sliding window folds keep {sliding[-1].train_stop - sliding[-1].train_start} training rows")
+
+    print("\nMAE by model:")
+    print(backtest.metrics()['MAE'].round(2))
+    print("\nMAE by horizon (days ahead):")
+    by_horizon = backtest.metrics(by='horizon')['MAE'].unstack()
+    print(by_horizon[[1, 7, 14, 30]].round(2))
+    print("\nMAE by season:")
+    print(backtest.metrics(by='season')['MAE'].unstack().round(2))
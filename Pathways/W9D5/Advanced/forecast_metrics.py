@@ -0,0 +1,167 @@
+"""
+Forecast Error Metrics for Many Models at Once
+
+The course scripts score each model with its own calculate_metrics() call,
+and each call runs four separate scikit-learn functions over the data:
+
+    rf_metrics = calculate_metrics(y_test, rf_preds, "Random Forest")
+    persistence_metrics = calculate_metrics(y_test, persistence_preds, "Persistence")
+    ...
+
+forecast_metrics() takes all the forecasts as one (models x samples) matrix
+and the actual values once:
+  - errors = predictions - actual (broadcast over the model rows)
+  - MAE, RMSE and the R² numerator are row reductions of that matrix
+  - MAPE is a matrix-vector product: |errors| @ (1 / |actual|) / n
+  - the R² denominator depends only on the actual values, so it is computed once
+
+grouped_metrics() gives the same numbers per group (per horizon, per
+season, ...): the samples are sorted by group once, and every sum is taken
+per group with np.add.reduceat over the sorted columns.
+"""
+
+import numpy as np
+import pandas as pd
+
+METRICS = ['MAE', 'RMSE', 'MAPE', 'R²']
+
+
+def _matrix(predictions, names):
+    """(models x samples) float array and the model names"""
+    if isinstance(predictions, dict):
+        names = list(predictions) if names is None else list(names)
+        predictions = [predictions[name] for name in names]
+    matrix = np.atleast_2d(np.asarray(predictions, dtype=np.float64))
+    if names is None:
+        names = [f"Model {i + 1}" for i in range(len(matrix))]
+    if len(names) != len(matrix):
+        raise ValueError(f"{len(names)} names for {len(matrix)} models")
+    return matrix, list(names)
+
+
+def _table(sums, counts, names, index):
+    """Metrics from per-(model, group) sums of |e|, e², |e|/|y| and the actual values' spread"""
+    abs_sum, sq_sum, pct_sum, spread = sums
+    return pd.DataFrame({
+        'MAE': (abs_sum / counts).ravel(),
+        'RMSE': np.sqrt(sq_sum / counts).ravel(),
+        'MAPE': (pct_sum / counts * 100).ravel(),
+        'R²': (1 - sq_sum / spread).ravel(),
+    }, index=index)
+
+
+def forecast_metrics(actual, predictions, names=None):
+    """MAE, RMSE, MAPE and R² for every model
+
+    Args:
+        actual: The observed values (one per sample)
+        predictions: {name: forecasts} or a (models x samples) array
+        names: Model names (needed for an array; selects/orders a dict)
+
+    Returns:
+        DataFrame with one row per model (index 'Model') and the columns
+        MAE, RMSE, MAPE (%) and R²
+    """
+    matrix, names = _matrix(predictions, names)
+    actual = np.asarray(actual, dtype=np.float64)
+    errors = matrix - actual
+    abs_errors = np.abs(errors)
+    sums = (abs_errors.sum(axis=1),
+            np.einsum('ij,ij->i', errors, errors),
+            abs_errors @ (1 / (np.abs(actual) + 1e-10)),
+            np.sum((actual - actual.mean()) ** 2))
+    return _table(sums, len(actual), names, pd.Index(names, name='Model'))
+
+
+def grouped_metrics(actual, predictions, groups, names=None, group_name='group'):
+    """forecast_metrics() for every group of samples, from one sort
+
+    Args:
+        actual: The observed values
+        predictions: {name: forecasts} or a (models x samples) array
+        groups: Group label of every sample (horizon, season, station, ...);
+                a Categorical keeps its category order
+        names: Model names
+        group_name: Name of the group level in the result
+
+    Returns:
+        DataFrame indexed by (Model, group) with the metric columns and 'n'
+    """
+    matrix, names = _matrix(predictions, names)
+    actual = np.asarray(actual, dtype=np.float64)
+    codes, labels = pd.factorize(groups, sort=True)
+    keep = codes >= 0  # samples without a group are left out
+    order = np.flatnonzero(keep)[np.argsort(codes[keep], kind='stable')]
+    sorted_codes = codes[order]
+    starts = np.r_[0, np.flatnonzero(sorted_codes[1:] != sorted_codes[:-1]) + 1]
+    present = sorted_codes[starts]
+    y = actual[order]
+    errors = matrix[:, order] - y
+    abs_errors = np.abs(errors)
+    counts = np.diff(np.r_[starts, len(order)])
+
+    group_mean = np.add.reduceat(y, starts) / counts
+    spread = np.add.reduceat((y - np.repeat(group_mean, counts)) ** 2, starts)
+    sums = (np.add.reduceat(abs_errors, starts, axis=1),
+            np.add.reduceat(errors ** 2, starts, axis=1),
+            np.add.reduceat(abs_errors / (np.abs(y) + 1e-10), starts, axis=1),
+            spread)
+    index = pd.MultiIndex.from_product([names, labels[present]], names=['Model', group_name])
+    table = _table(sums, counts, names, index)
+    table['n'] = np.tile(counts, len(names))
+    return table
+
+
+if __name__ == "__main__":
+    import time
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    def calculate_metrics(actual, predicted, name="Model"):
+        """The per-model function from model_evaluation.py"""
+        return {
+            'Model': name,
+            'MAE': mean_absolute_error(actual, predicted),
+            'RMSE': np.sqrt(mean_squared_error(actual, predicted)),
+            'MAPE': np.mean(np.abs((actual - predicted) / (np.abs(actual) + 1e-10))) * 100,
+            'R²': r2_score(actual, predicted),
+        }
+
+    # 40 candidate models scored on 10 years of daily data for 50 stations
+    rng = np.random.default_rng(42)
+    days, stations, n_models = 3650, 50, 40
+    dates = pd.date_range('2014-01-01', periods=days, freq='D')
+    actual = np.tile(15 - 15 * np.cos(2 * np.pi * np.arange(days) / 365), stations) \
+        + rng.normal(0, 3, days * stations)
+    station_ids = np.repeat(np.arange(stations), days)
+    predictions = actual + rng.normal(0, 1, (n_models, 1)) * rng.normal(1, 0.2, (n_models, len(actual)))
+    names = [f"model_{i:02d}" for i in range(n_models)]
+
+    start = time.perf_counter()
+    looped = pd.DataFrame([calculate_metrics(actual, p, name) for p, name in zip(predictions, names)]
+                          ).set_index('Model')
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    table = forecast_metrics(actual, predictions, names)
+    fast_time = time.perf_counter() - start
+    print(f"{n_models} models x {len(actual):,} samples: calculate_metrics() per model {loop_time:.2f}s, "
+          f"one matrix {fast_time:.3f}s")
+    print(f"Same metrics: {np.allclose(looped[METRICS], table[METRICS])}")
+
+    # Per station: one sort instead of a call per model and station
+    start = time.perf_counter()
+    looped_groups = {(name, s): calculate_metrics(actual[station_ids == s], predictions[i, station_ids == s], name)
+                     for i, name in enumerate(names[:5]) for s in range(stations)}
+    loop_time = (time.perf_counter() - start) * n_models / 5
+    start = time.perf_counter()
+    by_station = grouped_metrics(actual, predictions, station_ids, names, group_name='station')
+    group_time = time.perf_counter() - start
+    expected = pd.DataFrame(looped_groups).T[METRICS].astype(float)
+    print(f"Per station: loop ~{loop_time:.1f}s (timed on 5 models), grouped_metrics {group_time:.3f}s")
+    print(f"Same per-station metrics: {np.allclose(by_station.loc[expected.index, METRICS], expected)}")
+
+    seasons = pd.Categorical(np.array(['Winter', 'Spring', 'Summer', 'Autumn'])[dates.month.to_numpy() % 12 // 3],
+                             categories=['Winter', 'Spring', 'Summer', 'Autumn'])
+    by_season = grouped_metrics(actual[:days], {'model_00': predictions[0, :days]}, seasons,
+                                group_name='season')
+    print("\nOne model, first station, by season:")
+    print(by_season.round(3))
@@ -0,0 +1,138 @@
+"""
+Evaluating a Forecast Model at Several Horizons at Once
+
+model_evaluation.py used to call model.predict() once per row and horizon:
+
+    for i in range(len(df) - horizon):
+        pred = model.predict(df.iloc[i:i+1][features])[0]
+
+Every call slices a one-row DataFrame and runs all the trees of the forest
+for a single sample - thousands of tiny predictions.
+
+Here the prediction made from row i does not depend on the horizon (the same
+features are used), only the actual value it is compared with does. So:
+  1. predict once, on the full feature matrix
+  2. build the targets for every horizon at once: a (rows x horizons) matrix
+     where column k holds the temperature horizons[k] rows later (NaN past
+     the end of the data)
+  3. errors = targets - predictions[:, None], and every metric is a NaN-aware
+     mean down the columns - one number per horizon
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def shifted_targets(values, horizons):
+    """(rows x horizons) matrix: column k is values shifted back by horizons[k]
+
+    The last horizons[k] rows of column k have no future value and are NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    horizons = np.asarray(horizons)
+    rows = np.arange(len(values))[:, None] + horizons[None, :]
+    inside = rows < len(values)
+    return np.where(inside, values[np.minimum(rows, len(values) - 1)], np.nan)
+
+
+def horizon_metrics(targets, predictions, horizons):
+    """MAE, RMSE, MAPE and R² for every horizon, from the whole error matrix
+
+    Args:
+        targets: (rows x horizons) matrix from shifted_targets()
+        predictions: One prediction per row
+        horizons: The horizons of the target columns
+
+    Returns:
+        DataFrame indexed like calculate_metrics() results ("1-day ahead", ...)
+    """
+    errors = targets - np.asarray(predictions, dtype=np.float64)[:, None]
+    mean_target = np.nanmean(targets, axis=0)
+    ss_residual = np.nansum(errors ** 2, axis=0)
+    ss_total = np.nansum((targets - mean_target) ** 2, axis=0)
+    return pd.DataFrame({
+        'MAE': np.nanmean(np.abs(errors), axis=0),
+        'RMSE': np.sqrt(np.nanmean(errors ** 2, axis=0)),
+        'MAPE': np.nanmean(np.abs(errors / np.abs(targets + 1e-10)), axis=0) * 100,
+        'R²': 1 - ss_residual / ss_total,
+    }, index=pd.Index([f"{h}-day ahead" for h in horizons], name='Model'))
+
+
+def forecast_at_horizons(model, df, features, horizons, target='temperature'):
+    """Forecasts and metrics for several horizons with a single predict() call
+
+    Args:
+        model: A fitted model with a predict() method
+        df: DataFrame with the feature columns and the target column
+        features: Feature column names
+        horizons: Steps ahead to evaluate, e.g. [1, 3, 7, 14]
+        target: Column being forecast
+
+    Returns:
+        (results, metrics): results maps each horizon to a DataFrame with
+        'date', 'actual', 'predicted' and 'horizon' columns (one row per
+        forecast that can be checked), and metrics is horizon_metrics()
+    """
+    predictions = model.predict(df[features])
+    targets = shifted_targets(df[target], horizons)
+    results = {}
+    for k, h in enumerate(horizons):
+        n = len(df) - h
+        results[h] = pd.DataFrame({
+            'date': df.index[h:],
+            'actual': targets[:n, k],
+            'predicted': predictions[:n],
+            'horizon': h,
+        })
+    return results, horizon_metrics(targets, predictions, horizons)
+
+
+if __name__ == "__main__":
+    import time
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    def forecast_at_horizon(model, df, features, horizon):
+        """The row-by-row version this module replaces"""
+        results = []
+        for i in range(len(df) - horizon):
+            pred = model.predict(df.iloc[i:i+1][features])[0]
+            results.append({'date': df.index[i + horizon],
+                            'actual': df.iloc[i + horizon]['temperature'],
+                            'predicted': pred, 'horizon': horizon})
+        return pd.DataFrame(results)
+
+    # Two years of daily data with lag features
+    rng = np.random.default_rng(42)
+    dates = pd.date_range('2022-01-01', periods=730, freq='D')
+    day = (dates.dayofyear.to_numpy() - 1) / 365
+    df = pd.DataFrame({'temperature': 15 - 15 * np.cos(2 * np.pi * day) + rng.normal(0, 3, len(dates))},
+                      index=dates)
+    df['day_sin'], df['day_cos'] = np.sin(2 * np.pi * day), np.cos(2 * np.pi * day)
+    df['temp_lag1'] = df['temperature'].shift(1)
+    df['temp_lag7'] = df['temperature'].shift(7)
+    df = df.dropna()
+    features = ['day_sin', 'day_cos', 'temp_lag1', 'temp_lag7']
+    train, test = df.iloc[:540], df.iloc[540:]
+    model = RandomForestRegressor(n_estimators=100, random_state=42).fit(train[features],
+                                                                         train['temperature'])
+    horizons = [1, 3, 7, 14]
+
+    start = time.perf_counter()
+    looped = {h: forecast_at_horizon(model, test, features, h) for h in horizons}
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched, metrics = forecast_at_horizons(model, test, features, horizons)
+    batch_time = time.perf_counter() - start
+
+    print(f"{len(test)} test days, horizons {horizons}")
+    print(f"Row-by-row predict: {loop_time:.2f}s")
+    print(f"One predict call:   {batch_time * 1000:.1f} ms ({loop_time / batch_time:.0f}x faster)")
+    print(f"Same forecasts: {all(looped[h].equals(batched[h]) for h in horizons)}")
+    expected = [[mean_absolute_error(looped[h]['actual'], looped[h]['predicted']),
+                 np.sqrt(mean_squared_error(looped[h]['actual'], looped[h]['predicted'])),
+                 r2_score(looped[h]['actual'], looped[h]['predicted'])] for h in horizons]
+    print(f"Same MAE, RMSE and R² as scikit-learn: "
+          f"{np.allclose(metrics[['MAE', 'RMSE', 'R²']].to_numpy(), expected)}")
+    print(metrics.round(3))
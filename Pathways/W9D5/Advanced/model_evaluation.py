@@ -12,16 +12,28 @@ Key concepts covered:
 5. Common pitfalls in weather forecasting evaluation
 """
 
-import pandas as pd
+import os
+import sys
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib
 import seaborn as sns
-from datetime import datetime, timedelta
+from datetime import datetime
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import warnings
 
+# climatology.py lives in the W5D5 Advanced folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'W5D5', 'Advanced'))
+from calendar_features import season_of
+from climatology import Climatology
+
+from forecast_metrics import forecast_metrics, grouped_metrics
+from horizon_evaluation import forecast_at_horizons
+from model_registry import ModelRegistry
+from prediction_intervals import QuantileForest, rf_prediction_interval
+from synthetic_weather import generate_weather
+
 # Configure matplotlib for Arch Linux
 matplotlib.use('TkAgg')  # Lightweight backend for Arch Linux
 
@@ -39,31 +51,12 @@ print("Part 1: Preparing weather forecasting data")
 def generate_seasonal_data(days=365, base_temp=15, variation=15, noise=3):
     """Generate synthetic temperature data with seasonal patterns"""
     
-    # Create dates
-    start_date = datetime(2023, 1, 1)
-    dates = [start_date + timedelta(days=i) for i in range(days)]
-    
-    # Generate temperatures with seasonal pattern
-    temperatures = []
-    for date in dates:
-        # Day of year normalized to [0,1]
-        day_of_year = (date.timetuple().tm_yday - 1) / 365
-        # Seasonal component (coldest in January, warmest in July)
-        seasonal = -np.cos(2 * np.pi * day_of_year)
-        # Add random noise
-        noise_val = np.random.normal(0, noise)
-        # Calculate temperature
-        temp = base_temp + variation * seasonal + noise_val
-        temperatures.append(temp)
-    
-    # Create DataFrame
-    weather_df = pd.DataFrame({
-        'date': dates,
-        'temperature': temperatures
-    })
-    
-    # Set date as index
-    weather_df.set_index('date', inplace=True)
+    # Temperatures with a seasonal pattern (coldest in January, warmest in
+    # July) plus random noise, for every day at once, drawn from the random
+    # state seeded above
+    weather_df = generate_weather(datetime(2023, 1, 1), periods=days, freq='D',
+                                  base_temp=base_temp, seasonal_amplitude=variation,
+                                  noise=noise, random_state=np.random)
     
     # Add useful features for forecasting
     weather_df['month'] = weather_df.index.month
@@ -112,18 +105,6 @@ plt.grid(True)
 # ----------------------------------------------
 print("\nPart 2: Time Series Specific Evaluation Metrics")
 
-# Define evaluation metrics function
-def calculate_metrics(actual, predicted, name="Model"):
-    """Calculate common evaluation metrics for time series forecasting"""
-    metrics = {
-        'Model': name,
-        'MAE': mean_absolute_error(actual, predicted),
-        'RMSE': np.sqrt(mean_squared_error(actual, predicted)),
-        'MAPE': np.mean(np.abs((actual - predicted) / np.abs(actual + 1e-10))) * 100,
-        'R²': r2_score(actual, predicted)
-    }
-    return metrics
-
 # Train a model for demonstration
 # For this teaching example, we'll use a RandomForest
 features = ['month', 'day_sin', 'day_cos', 'temp_lag1', 'temp_lag7', 'temp_ma7']
@@ -132,9 +113,11 @@ y_train = train_data['temperature']
 X_test = test_data[features]
 y_test = test_data['temperature']
 
-# Train the model
-rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
-rf_model.fit(X_train, y_train)
+# Train the model (or load it, if it was fitted on the same data before;
+# see model_registry.py)
+model_registry = ModelRegistry(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.model_registry'))
+rf_model = model_registry.fit(RandomForestRegressor(n_estimators=100, random_state=42),
+                              X_train, y_train, name='evaluation_random_forest')
 
 # Get predictions
 rf_preds = rf_model.predict(X_test)
@@ -143,38 +126,30 @@ rf_preds = rf_model.predict(X_test)
 persistence_preds = test_data['temp_lag1'].values
 
 # Create climatology forecast (historical average for this day of year)
-# Group train data by day of year and calculate mean temperature
-climatology = {}
-for day in range(1, 366):
-    # Get all temperatures for this day of year
-    day_temps = train_data[train_data['day_of_year'] == day]['temperature']
-    if len(day_temps) > 0:
-        climatology[day] = day_temps.mean()
-    else:
-        # If day not in training data, use closest day
-        closest_days = sorted(climatology.keys(), key=lambda x: abs(x - day))
-        if closest_days:
-            climatology[day] = climatology[closest_days[0]]
-        else:
-            climatology[day] = train_data['temperature'].mean()  # Fallback to overall mean
+# One pass over the training data gives the mean for every day of year; days
+# not in the training data use the closest day that is
+climatology = Climatology(train_data.index, train_data['temperature'],
+                          leap='dayofyear', circular=False)
 
 # Create climatology predictions
-climatology_preds = np.array([climatology.get(day, train_data['temperature'].mean()) 
-                              for day in test_data['day_of_year']])
+climatology_preds = climatology.expected(test_data.index)
 
-# Calculate metrics for each model
-rf_metrics = calculate_metrics(y_test, rf_preds, "Random Forest")
-persistence_metrics = calculate_metrics(y_test, persistence_preds, "Persistence")
-climatology_metrics = calculate_metrics(y_test, climatology_preds, "Climatology")
-
-# Combine metrics into a DataFrame
-all_metrics = pd.DataFrame([rf_metrics, persistence_metrics, climatology_metrics])
-all_metrics = all_metrics.set_index('Model')
+# Calculate MAE, RMSE, MAPE and R² for all models at once: the forecasts
+# form one (models x days) matrix that is compared with the actual values
+# in a single pass (see forecast_metrics.py)
+model_preds = {'Random Forest': rf_preds, 'Persistence': persistence_preds,
+               'Climatology': climatology_preds}
+all_metrics = forecast_metrics(y_test, model_preds)
 
 # Display metrics
 print("\nEvaluation metrics comparison:")
 print(all_metrics)
 
+# The same metrics for each season of the test period
+print("\nMAE by season:")
+print(grouped_metrics(y_test, model_preds, season_of(test_data.index), group_name='season')
+      ['MAE'].unstack().round(3))
+
 # Explain each metric
 print("\nMetric explanations:")
 print("1. MAE (Mean Absolute Error):")
@@ -203,63 +178,22 @@ print("   - Can be negative if predictions are worse than using the mean")
 # -------------------------------------
 print("\nPart 3: Importance of Forecast Horizon")
 
-# Function to generate forecasts for different horizons
-def forecast_at_horizon(model, df, features, horizon):
-    """Generate forecasts at a specific horizon"""
-    results = []
-    
-    # We'll use a simple approach for teaching purposes
-    # In production, you would use true walk-forward validation
-    for i in range(len(df) - horizon):
-        # Get features at current step
-        X_current = df.iloc[i:i+1][features]
-        
-        # Make prediction
-        pred = model.predict(X_current)[0]
-        
-        # Store actual value at horizon and prediction
-        if i + horizon < len(df):
-            actual = df.iloc[i + horizon]['temperature']
-            
-            results.append({
-                'date': df.index[i + horizon],
-                'actual': actual,
-                'predicted': pred,
-                'horizon': horizon
-            })
-    
-    return pd.DataFrame(results)
-
 # Generate forecasts at different horizons
+# The forecast made from each day's features is the same whatever the
+# horizon; only the day it is compared with changes. forecast_at_horizons()
+# (horizon_evaluation.py) therefore predicts once for the whole test set and
+# lines the predictions up with the temperature 1, 3, 7 and 14 days later.
 horizons = [1, 3, 7, 14]
-horizon_results = {}
+horizon_results, horizon_df = forecast_at_horizons(rf_model, test_data, features, horizons)
 
 for h in horizons:
     print(f"Generating {h}-day ahead forecasts...")
-    horizon_results[h] = forecast_at_horizon(rf_model, test_data, features, h)
     
-    # Calculate metrics for this horizon
-    metrics = calculate_metrics(
-        horizon_results[h]['actual'], 
-        horizon_results[h]['predicted'],
-        f"{h}-day ahead"
-    )
+    # Metrics for this horizon
+    metrics = horizon_df.loc[f"{h}-day ahead"]
     
     print(f"  MAE: {metrics['MAE']:.2f}°C, RMSE: {metrics['RMSE']:.2f}°C")
 
-# Collect all horizon metrics
-horizon_metrics = []
-for h in horizons:
-    metrics = calculate_metrics(
-        horizon_results[h]['actual'], 
-        horizon_results[h]['predicted'],
-        f"{h}-day ahead"
-    )
-    horizon_metrics.append(metrics)
-
-# Create DataFrame with metrics by horizon
-horizon_df = pd.DataFrame(horizon_metrics).set_index('Model')
-
 # Plot metrics by horizon
 plt.figure(figsize=(10, 6))
 plt.plot(horizons, horizon_df['MAE'], 'o-', label='MAE')
@@ -361,19 +295,8 @@ print("5. Always compare visualizations across different forecast horizons")
 # --------------------------
 print("\nPart 5: Evaluating Forecast Uncertainty")
 
-# Function to generate prediction intervals using Random Forest
-def rf_prediction_interval(model, X, percentile=90):
-    """Get prediction intervals from a Random Forest model"""
-    preds = []
-    for tree in model.estimators_:
-        preds.append(tree.predict(X))
-    preds = np.column_stack(preds)
-    
-    lower = np.percentile(preds, (100 - percentile) / 2, axis=1)
-    upper = np.percentile(preds, 100 - (100 - percentile) / 2, axis=1)
-    mean = np.mean(preds, axis=1)
-    
-    return mean, lower, upper
+# rf_prediction_interval() (prediction_intervals.py) turns the spread of the
+# individual trees' forecasts into a prediction interval
 
 # Generate predictions with uncertainty for the last 30 days
 last_30_days = test_data.iloc[-30:]
@@ -404,6 +327,14 @@ print(f"\nPrediction interval statistics:")
 print(f"- Interval coverage: {coverage:.1f}% (target: 90%)")
 print(f"- Average interval width: {interval_width:.2f}°C")
 
+# A quantile regression forest reads the interval from the actual temperatures
+# of the training days that share leaves with each forecast day
+qrf = QuantileForest(rf_model, X_train, y_train)
+_, qrf_lower, qrf_upper = qrf.interval(X_last30, percentile=90)
+qrf_coverage = np.mean((y_last30.values >= qrf_lower) & (y_last30.values <= qrf_upper)) * 100
+print(f"- Quantile forest interval coverage: {qrf_coverage:.1f}%, "
+      f"average width: {np.mean(qrf_upper - qrf_lower):.2f}°C")
+
 print("\nImportance of forecast uncertainty:")
 print("1. Point forecasts alone are insufficient for decision-making")
 print("2. Prediction intervals help understand the range of likely outcomes")
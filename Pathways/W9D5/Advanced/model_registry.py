@@ -0,0 +1,230 @@
+"""
+A Local Registry of Fitted Models
+
+Every forecasting script fits its LinearRegression and RandomForestRegressor
+again on each run, even when neither the data nor the settings changed - a
+random forest on a few years of hourly data takes many seconds, its saved
+copy a fraction of a second to load.
+
+ModelRegistry.fit() looks the model up before fitting it. The lookup key is
+a fingerprint of the training data (values, index and column names), the
+model class with all of its parameters, and the scikit-learn version, so a
+change to any of them means a new fit. Each fitted model is saved with
+joblib, uncompressed, so loading can memory-map its large arrays
+(mmap_mode='r') instead of reading them through pickle.
+
+Models are registered under a name ('random_forest'), and every new fit
+under that name becomes its next version; registry.json lists them with
+their settings, data size and date. Loading is lazy - nothing is read until
+a model is asked for - and at most max_loaded models stay in memory, the
+least recently used one being dropped first.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import clone
+
+MANIFEST = 'registry.json'
+
+
+def data_fingerprint(*arrays):
+    """Short hash of the values, index and column names of the training data"""
+    digest = hashlib.md5()
+    for data in arrays:
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+            names = data.columns if isinstance(data, pd.DataFrame) else [data.name]
+            digest.update(repr(list(names)).encode())
+        else:
+            data = np.ascontiguousarray(data)
+            digest.update(f"{data.dtype}{data.shape}".encode())
+            digest.update(data.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def model_fingerprint(estimator):
+    """Short hash of the model class, its parameters and the scikit-learn version"""
+    params = sorted((k, repr(v)) for k, v in estimator.get_params(deep=True).items())
+    text = f"{type(estimator).__module__}.{type(estimator).__name__}|{params}|{sklearn.__version__}"
+    return hashlib.md5(text.encode()).hexdigest()[:16]
+
+
+class ModelRegistry:
+    """Fitted scikit-learn models on disk, versioned by name
+
+    Example:
+        registry = ModelRegistry('models')
+        rf_model = registry.fit(RandomForestRegressor(n_estimators=100), X_train, y_train,
+                                name='random_forest')      # fitted once, loaded afterwards
+        rf_model = registry.load('random_forest')           # latest version
+    """
+
+    def __init__(self, folder, max_loaded=4, mmap_mode='r'):
+        """
+        Args:
+            folder: Where the models and registry.json are kept. The models
+                    are unpickled when loaded, so use a folder only you can
+                    write to, not a shared temp folder.
+            max_loaded: Models kept in memory at once (least recently used dropped)
+            mmap_mode: Passed to joblib.load ('r' memory-maps the arrays, None reads them)
+        """
+        self.folder = folder
+        self.max_loaded = max_loaded
+        self.mmap_mode = mmap_mode
+        self._loaded = OrderedDict()
+        self.events = []  # (key, 'fit' / 'load' / 'memory', seconds)
+        os.makedirs(folder, exist_ok=True)
+        self._manifest_path = os.path.join(folder, MANIFEST)
+        self.manifest = {}
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def _save_manifest(self):
+        temporary = self._manifest_path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temporary, self._manifest_path)  # never leave a half-written file
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.joblib")
+
+    def _remember(self, key, model):
+        self._loaded[key] = model
+        self._loaded.move_to_end(key)
+        while len(self._loaded) > self.max_loaded:
+            self._loaded.popitem(last=False)
+
+    def get(self, key):
+        """The model stored under key, loading it on first use"""
+        start = time.perf_counter()
+        if key in self._loaded:
+            self._loaded.move_to_end(key)
+            self.events.append((key, 'memory', time.perf_counter() - start))
+            return self._loaded[key]
+        if not os.path.exists(self._path(key)):
+            raise KeyError(f"No model stored under {key!r}")
+        model = joblib.load(self._path(key), mmap_mode=self.mmap_mode)
+        self._remember(key, model)
+        self.events.append((key, 'load', time.perf_counter() - start))
+        return model
+
+    def fit(self, estimator, X, y, name=None):
+        """The estimator fitted on (X, y): from the registry if it was fitted before
+
+        Args:
+            estimator: An unfitted scikit-learn estimator (it is cloned, not changed)
+            X, y: Training data
+            name: Register the model under this name (a new fit becomes a new version)
+
+        Returns:
+            The fitted model
+        """
+        key = f"{model_fingerprint(estimator)}-{data_fingerprint(X, y)}"
+        if key in self._loaded or os.path.exists(self._path(key)):
+            model, seconds = self.get(key), None
+        else:
+            start = time.perf_counter()
+            model = clone(estimator).fit(X, y)
+            seconds = time.perf_counter() - start
+            # Uncompressed, so the arrays can be memory-mapped when loading
+            joblib.dump(model, self._path(key) + '.tmp')
+            os.replace(self._path(key) + '.tmp', self._path(key))
+            self._remember(key, model)
+            self.events.append((key, 'fit', seconds))
+
+        versions = self.manifest.setdefault(name, []) if name is not None else None
+        if versions is not None and all(entry['key'] != key for entry in versions):
+            versions.append({
+                'version': len(versions) + 1,
+                'key': key,
+                'model': type(estimator).__name__,
+                'params': {k: repr(v) for k, v in estimator.get_params(deep=False).items()},
+                'n_samples': int(len(y)),
+                'features': list(X.columns) if isinstance(X, pd.DataFrame) else None,
+                'fit_seconds': None if seconds is None else round(seconds, 3),
+                'sklearn': sklearn.__version__,
+                'created': datetime.now().isoformat(timespec='seconds'),
+            })
+            self._save_manifest()
+        return model
+
+    def load(self, name, version=None):
+        """A registered model by name (latest version unless one is given)"""
+        versions = self.manifest.get(name)
+        if not versions:
+            raise KeyError(f"No model registered as {name!r}")
+        entry = versions[-1] if version is None else next(
+            (v for v in versions if v['version'] == version), None)
+        if entry is None:
+            raise KeyError(f"{name!r} has no version {version}")
+        return self.get(entry['key'])
+
+    def versions(self, name=None):
+        """DataFrame of the registered versions (of one name, or all)"""
+        rows = [dict(entry, name=n) for n, entries in self.manifest.items() if name in (None, n)
+                for entry in entries]
+        columns = ['name', 'version', 'model', 'n_samples', 'fit_seconds', 'created', 'key']
+        return pd.DataFrame(rows, columns=columns + [c for c in (rows[0] if rows else {}) if c not in columns])
+
+    def timings(self):
+        """Where each model came from this session ('fit', 'load' or 'memory') and how long it took"""
+        return pd.DataFrame(self.events, columns=['key', 'source', 'seconds'])
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+
+    rng = np.random.default_rng(42)
+    n = 20_000
+    X = pd.DataFrame(rng.normal(size=(n, 6)), columns=['month', 'day_sin', 'day_cos',
+                                                      'temp_lag1', 'temp_lag7', 'temp_ma7'])
+    y = pd.Series(X['temp_lag1'] * 0.8 + rng.normal(0, 1, n), name='temperature')
+    forest = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+
+    folder = tempfile.mkdtemp()
+    try:
+        # First run: fits and stores the models
+        registry = ModelRegistry(folder)
+        fitted = registry.fit(forest, X, y, name='random_forest')
+        registry.fit(LinearRegression(), X, y, name='linear_regression')
+
+        # A new process (e.g. an inference service starting up): nothing is
+        # fitted, and nothing is read until a model is needed
+        service = ModelRegistry(folder)
+        start = time.perf_counter()
+        loaded = service.load('random_forest')
+        print(f"Random forest: fitted in {registry.timings()['seconds'].iloc[0]:.1f}s, "
+              f"loaded in {time.perf_counter() - start:.2f}s (memory-mapped)")
+        print(f"Loaded model gives the same predictions: "
+              f"{np.array_equal(loaded.predict(X.iloc[:1000]), fitted.predict(X.iloc[:1000]))}")
+        refit = service.fit(forest, X, y, name='random_forest')
+        print(f"fit() with unchanged data and settings reuses it: {refit is loaded}")
+
+        # New data or new settings: a new version
+        service.fit(forest.set_params(n_estimators=20), X, y, name='random_forest')
+        service.fit(LinearRegression(), X.iloc[:-100], y.iloc[:-100], name='linear_regression')
+        print("\nRegistered versions:")
+        print(service.versions()[['name', 'version', 'model', 'n_samples', 'fit_seconds']])
+
+        # Only max_loaded models stay in memory
+        small = ModelRegistry(folder, max_loaded=2)
+        for name, version in [('random_forest', 1), ('linear_regression', 1), ('random_forest', 2),
+                              ('linear_regression', 1), ('random_forest', 1)]:
+            small.load(name, version)
+        print("\nLoads with room for 2 models in memory:")
+        print(small.timings()['source'].tolist())
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,239 @@
+"""
+Recursive Multi-Step Forecasting with a Ring Buffer of Lags
+
+A model that uses yesterday's temperature can only forecast one day ahead.
+To go further, each forecast is fed back in as the newest "observation" and
+the lag and moving-average features are rebuilt from it. The breakout answer
+does this with a one-row DataFrame per day: it copies the row, looks old
+temperatures up with test_data.loc, averages Python lists and calls predict()
+on a DataFrame - for one station at a time.
+
+Here the recent temperatures of every station sit in one fixed NumPy array
+used as a ring buffer (LagState):
+  - a lag is one column of the buffer (no shifting, no copying)
+  - each moving average is a running sum: add the new value, subtract the
+    one leaving the window
+  - pushing a day's forecasts overwrites the oldest column in place
+
+Every step fills a preallocated (stations x features) matrix and makes one
+predict() call for all stations, so a 30-day forecast is 30 predict() calls
+whether there is one station or thousands.
+
+Features are recognised by the names used in the course scripts: 'month',
+'day_of_year', 'day_sin', 'day_cos', 'temp_lag<k>' and 'temp_ma<w>'. As in
+the breakout answer, the model is given the feature row of the latest day
+(whose temp_ma7 includes that day's temperature) and its prediction becomes
+the next day's temperature.
+"""
+
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+CALENDAR_FEATURES = ('month', 'day_of_year', 'day_sin', 'day_cos')
+
+
+class LagState:
+    """The last `size` values of many series, kept in a ring buffer
+
+    Example:
+        state = LagState(history, size=8, windows=[7])
+        state.lag(1), state.window_mean(7)
+        state.push(new_values)
+    """
+
+    def __init__(self, history, size, windows=()):
+        """
+        Args:
+            history: (series x time) array of past values, oldest first
+                     (a 1D array is one series)
+            size: Values to keep; must cover the longest lag + 1 and the
+                  longest window
+            windows: Window lengths whose running means are kept up to date
+        """
+        history = np.atleast_2d(np.asarray(history, dtype=np.float64))
+        if history.shape[1] < size:
+            raise ValueError(f"Need at least {size} past values per series, got {history.shape[1]}")
+        self.size = size
+        self.buffer = np.array(history[:, -size:])
+        self.head = size - 1  # column holding the latest value
+        self._sums = {w: self.buffer[:, size - w:].sum(axis=1) for w in windows}
+
+    def lag(self, k):
+        """Values k steps before the latest one (lag 0 is the latest)"""
+        return self.buffer[:, (self.head - k) % self.size]
+
+    def window_mean(self, w):
+        """Mean of the latest w values"""
+        return self._sums[w] / w
+
+    def push(self, values):
+        """Add the next value of every series, dropping the oldest"""
+        for w, total in self._sums.items():
+            total += values - self.lag(w - 1)
+        self.head = (self.head + 1) % self.size
+        self.buffer[:, self.head] = values
+
+
+def _parse_features(features, prefix):
+    """(kind, argument) for every feature name, in order"""
+    pattern = re.compile(rf'{re.escape(prefix)}_(lag|ma)(\d+)$')
+    columns = []
+    for name in features:
+        match = pattern.match(name)
+        if match:
+            columns.append(('lag' if match.group(1) == 'lag' else 'mean', int(match.group(2))))
+        elif name in CALENDAR_FEATURES:
+            columns.append((name, None))
+        else:
+            raise ValueError(f"Cannot build feature '{name}' recursively; expected one of "
+                             f"{CALENDAR_FEATURES} or '{prefix}_lag<k>' / '{prefix}_ma<w>'")
+    return columns
+
+
+class RecursiveForecaster:
+    """Multi-step forecasts for many series at once from a one-step model
+
+    Example:
+        forecaster = RecursiveForecaster(rf_model, features)
+        preds = forecaster.forecast(test_data['temperature'], test_data.index[-1], horizon=7)
+    """
+
+    def __init__(self, model, features, prefix='temp', period=365):
+        """
+        Args:
+            model: A fitted model with a predict() method
+            features: The feature names the model was fitted on, in order
+            prefix: Prefix of the lag and moving-average names ('temp_lag1')
+            period: Days per year in day_sin/day_cos
+        """
+        fitted = getattr(model, 'feature_names_in_', None)
+        if fitted is not None and list(fitted) != list(features):
+            raise ValueError(f"The model was fitted on {list(fitted)}, not {list(features)}")
+        self.model = model
+        self.features = list(features)
+        self.period = period
+        self.columns = _parse_features(self.features, prefix)
+        self.windows = sorted({arg for kind, arg in self.columns if kind == 'mean'})
+        lags = [arg for kind, arg in self.columns if kind == 'lag']
+        self.size = max([k + 1 for k in lags] + self.windows + [1])
+
+    def _calendar(self, dates):
+        day_of_year = dates.dayofyear.to_numpy()
+        return {
+            'month': dates.month.to_numpy(),
+            'day_of_year': day_of_year,
+            'day_sin': np.sin(2 * np.pi * day_of_year / self.period),
+            'day_cos': np.cos(2 * np.pi * day_of_year / self.period),
+        }
+
+    def _predict(self, X):
+        # The feature order was checked against the model in __init__
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            return self.model.predict(X)
+
+    def forecast(self, history, last_date, horizon, freq='D'):
+        """Forecast `horizon` steps past last_date
+
+        Args:
+            history: Past values up to and including last_date, oldest first:
+                     a 1D array (one series) or (series x time) array. Only
+                     the last `self.size` values are used.
+            last_date: Date of the last value in history (shared by all series)
+            horizon: Steps to forecast
+            freq: Step between dates
+
+        Returns:
+            Forecasts for the `horizon` dates after last_date: 1D for one
+            series, (series x horizon) otherwise
+        """
+        single = np.ndim(history) == 1
+        state = LagState(np.asarray(history), self.size, self.windows)
+        n_series = state.buffer.shape[0]
+        # Feature rows belong to last_date and then to each forecast day
+        calendar = self._calendar(pd.date_range(last_date, periods=horizon, freq=freq))
+
+        X = np.empty((n_series, len(self.columns)))
+        out = np.empty((n_series, horizon))
+        for step in range(horizon):
+            for j, (kind, arg) in enumerate(self.columns):
+                if kind == 'lag':
+                    X[:, j] = state.lag(arg)
+                elif kind == 'mean':
+                    X[:, j] = state.window_mean(arg)
+                else:
+                    X[:, j] = calendar[kind][step]
+            out[:, step] = self._predict(X)
+            state.push(out[:, step])
+        return out[0] if single else out
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    from sklearn.ensemble import RandomForestRegressor
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from synthetic_weather import generate_weather
+
+    def add_features(df):
+        df['month'] = df.index.month
+        df['day_sin'] = np.sin(2 * np.pi * df.index.dayofyear / 365)
+        df['day_cos'] = np.cos(2 * np.pi * df.index.dayofyear / 365)
+        df['temp_lag1'] = df['temperature'].shift(1)
+        df['temp_lag7'] = df['temperature'].shift(7)
+        df['temp_ma7'] = df['temperature'].rolling(window=7).mean()
+        return df
+
+    def pandas_forecast(model, features, temps, horizon):
+        """Reference: append each forecast and rebuild every feature with pandas"""
+        temps = temps.copy()
+        preds = []
+        for _ in range(horizon):
+            row = add_features(temps.to_frame('temperature')).iloc[-1:]
+            preds.append(model.predict(row[features])[0])
+            temps[temps.index[-1] + pd.Timedelta(days=1)] = preds[-1]
+        return np.array(preds)
+
+    # One model trained on three years of one station
+    train = add_features(generate_weather('2020-01-01', periods=3 * 365, random_state=42)).dropna()
+    features = ['month', 'day_sin', 'day_cos', 'temp_lag1', 'temp_lag7', 'temp_ma7']
+    model = RandomForestRegressor(n_estimators=100, min_samples_leaf=5, random_state=42,
+                                  n_jobs=-1).fit(train[features], train['temperature'])
+    forecaster = RecursiveForecaster(model, features)
+
+    # The last 60 days of 2,000 stations, forecast 30 days ahead
+    stations, horizon = 2000, 30
+    long = generate_weather('2023-11-02', periods=60, stations=stations, random_state=7)
+    history = long.pivot(index='station', columns='date', values='temperature')
+    last_date = history.columns[-1]
+
+    start = time.perf_counter()
+    batched = forecaster.forecast(history.to_numpy(), last_date, horizon)
+    batch_time = time.perf_counter() - start
+
+    checked = 10
+    start = time.perf_counter()
+    reference = np.array([pandas_forecast(model, features, history.iloc[s], horizon)
+                          for s in range(checked)])
+    loop_time = (time.perf_counter() - start) / checked
+    print(f"{stations:,} stations x {horizon} days: ring buffer {batch_time:.2f}s "
+          f"({horizon} predict calls)")
+    print(f"Rebuilding features with pandas: {loop_time:.2f}s per station "
+          f"(~{loop_time * stations / 60:.0f} min for all)")
+    print(f"Same forecasts as the pandas rebuild: {np.allclose(batched[:checked], reference)}")
+    print(f"Single series gives the same as the batch: "
+          f"{np.allclose(forecaster.forecast(history.iloc[3].to_numpy(), last_date, horizon), batched[3])}")
+
+    # The running means stay exact over many pushes
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(5, 1000))
+    state = LagState(values[:, :10], size=10, windows=[3, 10])
+    for t in range(10, 1000):
+        state.push(values[:, t])
+    print(f"Running 10-value mean after 990 pushes matches: "
+          f"{np.allclose(state.window_mean(10), values[:, -10:].mean(axis=1))}")
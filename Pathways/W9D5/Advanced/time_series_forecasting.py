@@ -3,6 +3,9 @@ Time Series Forecasting Models for Weather Data
 This example demonstrates various time series forecasting approaches for temperature prediction.
 """
 
+import os
+import sys
+
 import matplotlib
 matplotlib.use('TkAgg') 
 import pandas as pd
@@ -16,8 +19,30 @@ from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 import warnings
 
-# Suppress warning messages for cleaner output
-warnings.filterwarnings('ignore')
+# calendar_features.py lives in the W5D5 Advanced folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'W5D5', 'Advanced'))
+from calendar_features import add_calendar_features
+
+from backtesting import Arima, Backtest, HoltWinters, MovingAverage, Regressor, SimpleExpSmoothing
+from fit_cache import FitCache
+from lag_features import LagFeatures
+from model_registry import ModelRegistry
+from synthetic_weather import generate_weather
+
+# Warnings from the statsmodels fits are recorded by the fit cache (see the
+# telemetry printed after the ARIMA section) instead of being hidden; this
+# one comes from plotting pandas dates and matplotlib dates on the same axes
+warnings.filterwarnings('ignore', message='This axis already has a converter set')
+
+# Fitted statsmodels models are kept on disk, so running the script again
+# loads them instead of fitting from scratch (see fit_cache.py). The cache is
+# a folder next to this script, not in the shared temp folder: its files are
+# unpickled when loaded, so no one else should be able to write there.
+fit_cache = FitCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.fit_cache'))
+
+# The same for the scikit-learn models: a model is only fitted again when the
+# training data or its settings change (see model_registry.py)
+model_registry = ModelRegistry(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.model_registry'))
 
 # Set random seed for reproducibility
 np.random.seed(42)
@@ -32,43 +57,24 @@ print("Part 1: Preparing sample weather data")
 # Create dates
 start_date = datetime(2022, 1, 1)
 end_date = datetime(2023, 12, 31)
-dates = pd.date_range(start=start_date, end=end_date, freq='D')
-
-# Generate seasonal temperature pattern with noise
-def generate_temp(date):
-    # Day of year from 0 to 1
-    day_of_year = (date.dayofyear - 1) / 365
-    # Seasonal cycle (coldest around January 15, warmest around July 15)
-    seasonal_factor = -np.cos(2 * np.pi * day_of_year)
-    # Base temperature + seasonal variation + random noise
-    return 15 + 15 * seasonal_factor + np.random.normal(0, 3)
-
-# Generate temperatures
-temperatures = [generate_temp(date) for date in dates]
-
-# Create DataFrame
-df = pd.DataFrame({
-    'date': dates,
-    'temperature': temperatures
-})
-
-# Set date as index
-df.set_index('date', inplace=True)
 
-# Add some features that will be useful for machine learning approaches
-df['month'] = df.index.month
-df['day_of_year'] = df.index.dayofyear
-# Create cyclical features to represent seasonality
-df['day_sin'] = np.sin(2 * np.pi * df.index.dayofyear / 365)
-df['day_cos'] = np.cos(2 * np.pi * df.index.dayofyear / 365)
+# Generate seasonal temperature pattern with noise for every date at once:
+# base 15°C, seasonal swing of 15°C (coldest around January 15, warmest
+# around July 15) and random noise. np.random is the random state seeded
+# above, so the numbers are the same as drawing them one date at a time.
+df = generate_weather(start_date, end_date, freq='D', base_temp=15,
+                      seasonal_amplitude=15, noise=3, random_state=np.random)
 
-# Add lag features (previous day, previous week)
-df['temp_lag1'] = df['temperature'].shift(1)
-df['temp_lag7'] = df['temperature'].shift(7)
+# Add some features that will be useful for machine learning approaches:
+# month, day of year, and cyclical sin/cos features to represent seasonality
+# (sin/cos of 2*pi*day_of_year/365), all built in one vectorized pass
+add_calendar_features(df, features=('month', 'day_of_year', 'day_sin', 'day_cos'))
 
-# Create moving averages (past 3 days, past week)
-df['temp_ma3'] = df['temperature'].rolling(window=3).mean()
-df['temp_ma7'] = df['temperature'].rolling(window=7).mean()
+# Add lag features (previous day, previous week) and moving averages (past
+# 3 days, past week) - temp_lag1, temp_lag7, temp_ma3 and temp_ma7 - built
+# together in one block (see lag_features.py)
+lag_features = LagFeatures(lags=[1, 7], windows=[3, 7])
+df = lag_features.add_to(df)
 
 # Drop missing values created by lag/rolling features
 df = df.dropna()
@@ -161,24 +167,24 @@ def holt_winters(series):
     """Generate forecasts using Holt-Winters' method with appropriate settings"""
     try:
         # First attempt with default settings but shorter seasonal period
-        model = ExponentialSmoothing(
+        model_fit = fit_cache.fit(
+            ExponentialSmoothing,
             series,
             seasonal_periods=30,  # Monthly seasonality instead of annual
             trend='add',
             seasonal='add',
             use_boxcox=False
         )
-        model_fit = model.fit()
         
     except ValueError:
         # Fallback if that fails: simple exponential smoothing with trend
-        model = ExponentialSmoothing(
+        model_fit = fit_cache.fit(
+            ExponentialSmoothing,
             series,
             trend='add',
             seasonal=None,  # Remove seasonality component
             use_boxcox=False
         )
-        model_fit = model.fit()
         
         print("Note: Using simpler model without seasonality due to insufficient data")
     
@@ -222,8 +228,7 @@ def arima_forecast(series):
     try:
         # For simplicity, we'll use a basic ARIMA model
         # In practice, order should be determined using auto_arima or AIC/BIC
-        model = ARIMA(series, order=(5, 1, 0))  # AR(5), differencing(1), MA(0)
-        model_fit = model.fit()
+        model_fit = fit_cache.fit(ARIMA, series, order=(5, 1, 0))  # AR(5), differencing(1), MA(0)
         
         # Generate forecasts
         forecast = model_fit.forecast(steps=len(test_data))
@@ -254,6 +259,14 @@ arima_mae = mean_absolute_error(test_data['temperature'], arima_forecast)
 arima_rmse = np.sqrt(mean_squared_error(test_data['temperature'], arima_forecast))
 print(f"ARIMA - MAE: {arima_mae:.2f}°C, RMSE: {arima_rmse:.2f}°C")
 
+# What happened in each statsmodels fit: fitted now or loaded from the cache,
+# how long it took, whether the optimizer converged, and any warnings
+telemetry = fit_cache.telemetry()
+print("\nstatsmodels fits:")
+print(telemetry[['model', 'source', 'seconds', 'converged', 'iterations']].round(3).to_string(index=False))
+for _, fit in telemetry[telemetry['warnings'] != ''].iterrows():
+    print(f"- {fit['model']}: {fit['warnings']}")
+
 
 # Part 3: Machine Learning Approaches
 # ----------------------------------
@@ -270,8 +283,7 @@ y_test = test_data['temperature']
 print("\n1. Linear Regression")
 
 # Train the model
-lr_model = LinearRegression()
-lr_model.fit(X_train, y_train)
+lr_model = model_registry.fit(LinearRegression(), X_train, y_train, name='forecasting_linear_regression')
 
 # Make predictions
 lr_preds = lr_model.predict(X_test)
@@ -305,8 +317,8 @@ print(feature_importance.sort_values('Coefficient', ascending=False))
 print("\n2. Random Forest")
 
 # Train the model
-rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
-rf_model.fit(X_train, y_train)
+rf_model = model_registry.fit(RandomForestRegressor(n_estimators=100, random_state=42),
+                              X_train, y_train, name='forecasting_random_forest')
 
 # Make predictions
 rf_preds = rf_model.predict(X_test)
@@ -394,6 +406,45 @@ plt.ylabel('Temperature (°C)')
 plt.legend(loc='upper left')
 plt.grid(True)
 
+
+# Part 5: Backtesting from Many Forecast Origins
+# ---------------------------------------------
+print("\nPart 5: Backtesting from Many Forecast Origins")
+
+# One train/test split gives one ranking. A rolling-origin backtest trains
+# each model on the first year, forecasts the next 30 days, then moves the
+# origin forward 60 days and repeats (expanding window). The regression
+# models forecast recursively from the origin, so every model only sees the
+# data up to it (see backtesting.py). Each fold's fitted models are cached in
+# .backtest_cache/ next to this script, so running the script again only
+# fits what changed. The folds x models grid runs in this process (n_jobs=1);
+# n_jobs=None would use a worker process per core, but then the script's
+# top-level code would have to be under `if __name__ == "__main__":`,
+# because on Windows and macOS every worker re-imports the script.
+ml_features = ['month', 'day_sin', 'day_cos', 'temp_lag1', 'temp_lag7', 'temp_ma7']
+backtest_models = {
+    'Moving Average': MovingAverage(window=7),
+    'Simple Exp Smoothing': SimpleExpSmoothing(alpha=0.3),
+    'Holt-Winters': HoltWinters(seasonal_periods=30),
+    'ARIMA': Arima(order=(5, 1, 0)),
+    'Linear Regression': Regressor(LinearRegression(), ml_features),
+    'Random Forest': Regressor(RandomForestRegressor(n_estimators=100, random_state=42), ml_features),
+}
+backtest = Backtest(df, backtest_models, initial=365, horizon=30, step=60, n_jobs=1,
+                    cache_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.backtest_cache'))
+backtest.run()
+print(f"{len(backtest.folds)} forecast origins x {len(backtest_models)} models "
+      f"({int(backtest.timings['cached'].sum())} fits loaded from the cache)")
+
+print("\nAverage error over all origins:")
+print(backtest.metrics()[['MAE', 'RMSE']].round(2))
+
+print("\nMAE by days ahead:")
+print(backtest.metrics(by='horizon')['MAE'].unstack()[[1, 7, 14, 30]].round(2))
+
+print("\nMAE by season of the forecast day:")
+print(backtest.metrics(by='season')['MAE'].unstack().round(2))
+
 print("\nIntroduction to Deep Learning for Time Series (Conceptual):")
 print("1. Recurrent Neural Networks (RNNs) - Can model sequential dependencies")
 print("2. Long Short-Term Memory (LSTM) - Better for capturing long-term patterns")
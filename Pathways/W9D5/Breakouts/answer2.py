@@ -4,6 +4,9 @@ BREAKOUT ROOM 2: BUILDING SIMPLE WEATHER FORECASTING MODELS - ANSWER KEY
 This file provides complete solutions for the weather forecasting model building activity.
 """
 
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -13,12 +16,22 @@ import seaborn as sns
 from datetime import datetime, timedelta
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import warnings
 
+# forecast_metrics.py, model_registry.py, recursive_forecast.py and synthetic_weather.py live in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from forecast_metrics import forecast_metrics
+from model_registry import ModelRegistry
+from recursive_forecast import RecursiveForecaster
+from synthetic_weather import generate_weather
+
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
+# Fitted models are kept on disk and reused while the data and settings are
+# unchanged (see model_registry.py)
+model_registry = ModelRegistry(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.model_registry'))
+
 # Set random seed for reproducibility
 np.random.seed(42)
 
@@ -26,31 +39,12 @@ np.random.seed(42)
 # -----------------------------------
 def generate_data(days=365):
     """Generate synthetic temperature data with seasonal patterns"""
-    # Create dates
-    start_date = datetime(2023, 1, 1)
-    dates = [start_date + timedelta(days=i) for i in range(days)]
-    
-    # Generate temperatures with seasonal pattern
-    temperatures = []
-    for date in dates:
-        # Day of year normalized to [0,1]
-        day_of_year = (date.timetuple().tm_yday - 1) / 365
-        # Seasonal component (coldest in January, warmest in July)
-        seasonal = -np.cos(2 * np.pi * day_of_year)
-        # Add random noise
-        noise_val = np.random.normal(0, 3)
-        # Calculate temperature
-        temp = 15 + 15 * seasonal + noise_val
-        temperatures.append(temp)
-    
-    # Create DataFrame
-    df = pd.DataFrame({
-        'date': dates,
-        'temperature': temperatures
-    })
-    
-    # Set date as index
-    df.set_index('date', inplace=True)
+    # Temperatures with a seasonal pattern (coldest in January, warmest in
+    # July) plus random noise, for every day at once, drawn from the random
+    # state seeded above
+    df = generate_weather(datetime(2023, 1, 1), periods=days, freq='D',
+                          base_temp=15, seasonal_amplitude=15, noise=3,
+                          random_state=np.random)
     
     # Add features useful for forecasting
     df['month'] = df.index.month
@@ -80,26 +74,9 @@ except FileNotFoundError:
 print("\nFirst 5 rows of the dataset:")
 print(weather_data.head())
 
-# Define a function to calculate all evaluation metrics
-def calculate_metrics(actual, predicted, model_name="Model"):
-    """Calculate common evaluation metrics for forecasting"""
-    metrics = {}
-    metrics['Model'] = model_name
-    
-    # Mean Absolute Error
-    metrics['MAE'] = mean_absolute_error(actual, predicted)
-    
-    # Root Mean Squared Error
-    metrics['RMSE'] = np.sqrt(mean_squared_error(actual, predicted))
-    
-    # Mean Absolute Percentage Error
-    # Avoid division by zero by adding a small constant
-    metrics['MAPE'] = np.mean(np.abs((actual - predicted) / (np.abs(actual) + 1e-10))) * 100
-    
-    # R-squared (Coefficient of determination)
-    metrics['R²'] = r2_score(actual, predicted)
-    
-    return metrics
+# Evaluation metrics: forecast_metrics(actual, {name: predictions, ...})
+# returns MAE, RMSE, MAPE and R² for every model given, one row per model.
+# MAPE avoids division by zero by adding a small constant to the actual values.
 
 # Split into training and testing sets (80% train, 20% test)
 train_size = int(len(weather_data) * 0.8)
@@ -120,14 +97,12 @@ print("\nPart 2: Persistence Forecast Model")
 persistence_preds = test_data['temp_lag1'].values
 
 # ANSWER: Evaluate persistence model
-persistence_metrics = calculate_metrics(test_data['temperature'].values, 
-                                       persistence_preds, 
-                                       "Persistence")
+persistence_metrics = forecast_metrics(test_data['temperature'].values,
+                                       {'Persistence': persistence_preds}).loc['Persistence']
 
 print("\nPersistence Model Metrics:")
 for metric, value in persistence_metrics.items():
-    if metric != 'Model':
-        print(f"{metric}: {value:.4f}")
+    print(f"{metric}: {value:.4f}")
 
 # ANSWER: Visualize persistence forecast
 plt.figure(figsize=(12, 6))
@@ -155,14 +130,12 @@ ma_forecast = train_data['temp_ma7'].iloc[-1]  # Last available MA from training
 ma_preds = np.full(len(test_data), ma_forecast)
 
 # ANSWER: Evaluate moving average model
-ma_metrics = calculate_metrics(test_data['temperature'].values, 
-                              ma_preds, 
-                              "Moving Average")
+ma_metrics = forecast_metrics(test_data['temperature'].values,
+                              {'Moving Average': ma_preds}).loc['Moving Average']
 
 print("\nMoving Average Model Metrics:")
 for metric, value in ma_metrics.items():
-    if metric != 'Model':
-        print(f"{metric}: {value:.4f}")
+    print(f"{metric}: {value:.4f}")
 
 # ANSWER: Visualize moving average forecast
 plt.figure(figsize=(12, 6))
@@ -194,19 +167,17 @@ X_test = test_data[features]
 y_test = test_data['temperature']
 
 # ANSWER: Train the Linear Regression model
-lr_model = LinearRegression()
-lr_model.fit(X_train, y_train)
+lr_model = model_registry.fit(LinearRegression(), X_train, y_train, name='breakout2_linear_regression')
 
 # ANSWER: Make predictions
 lr_preds = lr_model.predict(X_test)
 
 # ANSWER: Evaluate the model
-lr_metrics = calculate_metrics(y_test, lr_preds, "Linear Regression")
+lr_metrics = forecast_metrics(y_test, {'Linear Regression': lr_preds}).loc['Linear Regression']
 
 print("\nLinear Regression Model Metrics:")
 for metric, value in lr_metrics.items():
-    if metric != 'Model':
-        print(f"{metric}: {value:.4f}")
+    print(f"{metric}: {value:.4f}")
 
 # ANSWER: Examine coefficients
 coefficients = pd.DataFrame({
@@ -235,19 +206,18 @@ plt.tight_layout()
 # ANSWER: Train Random Forest model
 print("\nPart 5: Random Forest Model")
 
-rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
-rf_model.fit(X_train, y_train)
+rf_model = model_registry.fit(RandomForestRegressor(n_estimators=100, random_state=42),
+                              X_train, y_train, name='breakout2_random_forest')
 
 # ANSWER: Make predictions
 rf_preds = rf_model.predict(X_test)
 
 # ANSWER: Evaluate the model
-rf_metrics = calculate_metrics(y_test, rf_preds, "Random Forest")
+rf_metrics = forecast_metrics(y_test, {'Random Forest': rf_preds}).loc['Random Forest']
 
 print("\nRandom Forest Model Metrics:")
 for metric, value in rf_metrics.items():
-    if metric != 'Model':
-        print(f"{metric}: {value:.4f}")
+    print(f"{metric}: {value:.4f}")
 
 # ANSWER: Examine feature importance
 feature_importance = pd.DataFrame({
@@ -278,10 +248,9 @@ print("\nPart 6: Model Comparison")
 
 models = ['Persistence', 'Moving Average', 'Linear Regression', 'Random Forest']
 all_preds = [persistence_preds, ma_preds, lr_preds, rf_preds]
-all_metrics = [persistence_metrics, ma_metrics, lr_metrics, rf_metrics]
 
-# Combine all metrics into a DataFrame
-comparison = pd.DataFrame(all_metrics).set_index('Model')
+# Score all models together: one (models x days) matrix of forecasts
+comparison = forecast_metrics(test_data['temperature'].values, dict(zip(models, all_preds)))
 
 print("\nModel Comparison:")
 print(comparison)
@@ -331,63 +300,19 @@ last_date = test_data.index[-1]
 print(f"Last date in dataset: {last_date.strftime('%Y-%m-%d')}")
 
 # Create a 7-day forecast
+# Each day's forecast is fed back as the newest temperature and the lag and
+# moving-average features are rebuilt from it (recursive forecasting).
+# RecursiveForecaster keeps the recent temperatures in a small NumPy ring
+# buffer instead of copying DataFrame rows, and would forecast many stations
+# at once just as quickly.
 forecast_days = 7
 forecast_dates = [last_date + timedelta(days=i+1) for i in range(forecast_days)]
-forecasts = []
-
-# Start with the last available data point
-current_data = test_data.iloc[-1:].copy()
-
-# For each day in the forecast period
-for i in range(forecast_days):
-    # Predict temperature for the current day
-    prediction = rf_model.predict(current_data[features])[0]
-    
-    # Store the forecast
-    forecasts.append({
-        'date': forecast_dates[i],
-        'temperature': prediction
-    })
-    
-    # Create new row for the next day
-    next_day = current_data.copy()
-    next_day.index = [forecast_dates[i]]
-    next_day['temperature'] = prediction
-    next_day['month'] = forecast_dates[i].month
-    next_day['day_of_year'] = forecast_dates[i].timetuple().tm_yday
-    next_day['day_sin'] = np.sin(2 * np.pi * next_day['day_of_year'] / 365)
-    next_day['day_cos'] = np.cos(2 * np.pi * next_day['day_of_year'] / 365)
-    
-    # Update lag features
-    next_day['temp_lag1'] = current_data['temperature'].values[0]
-    
-    if i >= 6:  # Once we have 7 days, we can calculate a proper 7-day lag
-        next_day['temp_lag7'] = forecasts[i-6]['temperature']
-    else:  # Otherwise use the available historical data
-        lag7_date = forecast_dates[i] - timedelta(days=7)
-        if lag7_date in test_data.index:
-            next_day['temp_lag7'] = test_data.loc[lag7_date, 'temperature']
-        else:
-            next_day['temp_lag7'] = next_day['temp_lag1']  # Fallback
-    
-    # Update moving average
-    if i >= 6:  # Once we have 7 days, we can calculate a proper MA
-        temps = [f['temperature'] for f in forecasts[max(0, i-6):i+1]]
-        next_day['temp_ma7'] = sum(temps) / len(temps)
-    else:  # Mix of historical and forecast data
-        lookback = 7 - i - 1
-        hist_dates = [last_date - timedelta(days=j) for j in range(lookback, 0, -1)]
-        hist_temps = [test_data.loc[date, 'temperature'] for date in hist_dates if date in test_data.index]
-        forecast_temps = [f['temperature'] for f in forecasts[:i+1]]
-        all_temps = hist_temps + forecast_temps
-        next_day['temp_ma7'] = sum(all_temps) / len(all_temps)
-    
-    # Use this as the current data for the next iteration
-    current_data = next_day
+forecaster = RecursiveForecaster(rf_model, features)
+predictions = forecaster.forecast(test_data['temperature'].to_numpy(), last_date, forecast_days)
 
 # Create a DataFrame with the forecast
-forecast_df = pd.DataFrame(forecasts)
-forecast_df.set_index('date', inplace=True)
+forecast_df = pd.DataFrame({'temperature': predictions},
+                           index=pd.Index(forecast_dates, name='date'))
 
 print("\n7-Day Forecast:")
 print(forecast_df)
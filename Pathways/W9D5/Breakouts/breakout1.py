@@ -17,20 +17,28 @@ Follow the instructions below and complete the code where indicated.
 # The file contains daily weather measurements for a city over one year
 
 # First, we need to import the libraries we'll use
-import pandas as pd  # For data manipulation and analysis
+import os  # For building the path to the shared loader
+import sys
+
 import matplotlib.pyplot as plt  # For creating visualizations
 import numpy as np  # For numerical operations
 import seaborn as sns  # For advanced statistical visualizations
 
+# typed_loader.py lives in the W5D4 Advanced folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'W5D4', 'Advanced'))
+from typed_loader import load_csv
+
 # Set matplotlib to non-interactive backend to prevent display issues
 plt.ioff()  # Turn off interactive mode
 # Set up matplotlib for better looking plots
 plt.style.use('default')  # Use default matplotlib style
 plt.rcParams['figure.figsize'] = (10, 6)  # Set default figure size
 
-# Load the CSV file using pandas
-# pd.read_csv() reads a CSV file and creates a DataFrame (like a spreadsheet in Python)
-weather_data = pd.read_csv('weather_data.csv')
+# Load the CSV file into a DataFrame (like a spreadsheet in Python)
+# load_csv() reads it with pd.read_csv(), parsing the 'date' column to
+# datetime and setting it as the index while reading, with float32
+# measurements. The typed copy is cached, so the next run skips the parsing.
+weather_data = load_csv('weather_data.csv', index_col='date', report=True)
 
 # Print the first 5 rows to understand the data structure
 # .head() shows the first few rows of our dataset
@@ -67,19 +75,9 @@ if missing_values.sum() > 0:
 else:
     print("\nNo missing values found - data is clean!")
 
-# Convert the 'date' column to datetime format
-# pd.to_datetime() converts text dates to Python datetime objects
-# This allows us to work with dates more easily (sorting, extracting months, etc.)
-print("\nConverting date column to datetime format...")
-weather_data['date'] = pd.to_datetime(weather_data['date'])
-
-# Set the 'date' column as the index
-# This makes it easier to work with time series data
-print("Setting date as index...")
-weather_data = weather_data.set_index('date')
-
-# Ensure the index is recognized as a DatetimeIndex for proper attribute access
-weather_data.index = pd.to_datetime(weather_data.index)
+# The dates were converted to datetime objects and made the index while
+# loading. This allows us to work with dates more easily (sorting,
+# extracting months, etc.)
 
 # Check for and handle any outliers in the temperature column
 # We'll use a simple approach: identify values that are extremely high or low
@@ -336,7 +334,8 @@ print(f"  Minimum temperature: {weather_data['temperature'].min():.1f}°C")
 print(f"  Maximum temperature: {weather_data['temperature'].max():.1f}°C")
 
 print("\nSeasonal Temperature Averages:")
-seasonal_temps = weather_data.groupby('season')['temperature'].mean().round(1)
+# Temperatures are float32; widen the averages so rounded values print cleanly
+seasonal_temps = weather_data.groupby('season')['temperature'].mean().astype('float64').round(1)
 for season, temp in seasonal_temps.items():
     print(f"  {season}: {temp}°C")
 
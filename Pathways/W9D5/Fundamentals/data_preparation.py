@@ -3,10 +3,20 @@ Data Preparation for Weather Time Series
 This example demonstrates key preprocessing techniques for weather data.
 """
 
+import os
+import shutil
+import sys
+import tempfile
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from datetime import datetime
+
+# lag_features.py lives in the Advanced folder next to this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Advanced'))
+from hourly_prep import HourlyPrep, prepare_shards, read_shards
+from lag_features import LagFeatures
 
 # Load data (in a classroom setting, you would load a real CSV file)
 # Here we'll create sample data similar to what you might get from a weather station
@@ -17,7 +27,7 @@ np.random.seed(42)
 
 # Create dates for one month of hourly data
 start_date = datetime(2023, 1, 1)
-dates = [start_date + timedelta(hours=i) for i in range(24*30)]  # 30 days
+dates = pd.date_range(start_date, periods=24*30, freq='h')  # 30 days
 
 # Create a dataframe with some realistic weather data
 data = {
@@ -31,10 +41,11 @@ data = {
 
 df = pd.DataFrame(data)
 
-# Introduce missing values randomly (about 5% of data)
-for col in df.columns[1:]:  # Skip timestamp
-    mask = np.random.random(len(df)) < 0.05
-    df.loc[mask, col] = np.nan
+# Introduce missing values randomly (about 5% of data), for all columns at
+# once: one row of random numbers per column (skipping timestamp)
+value_columns = df.columns[1:]
+mask = np.random.random((len(value_columns), len(df))) < 0.05
+df[value_columns] = df[value_columns].mask(mask.T)
 
 # Create some outliers
 df.loc[np.random.choice(df.index, 5), 'temperature'] = 99  # Unrealistic temperatures
@@ -78,7 +89,7 @@ for col in df.columns:
     mask = df[col].isna()
     df_rolling.loc[mask, col] = rolling_mean[mask]
     # Any remaining NaNs at edges use ffill and bfill
-    df_rolling[col] = df_rolling[col].fillna(method='ffill').fillna(method='bfill')
+    df_rolling[col] = df_rolling[col].ffill().bfill()
 
 # Compare results for temperature
 plt.figure(figsize=(12, 6))
@@ -125,13 +136,13 @@ df_clean['day_of_week'] = df_clean.index.dayofweek  # Monday=0, Sunday=6
 df_clean['hour_sin'] = np.sin(2 * np.pi * df_clean['hour'] / 24)
 df_clean['hour_cos'] = np.cos(2 * np.pi * df_clean['hour'] / 24)
 
-# Add lag features (previous values)
-for lag in [1, 3, 24]:  # 1 hour ago, 3 hours ago, 24 hours ago
-    df_clean[f'temp_lag_{lag}h'] = df_clean['temperature'].shift(lag)
-
-# Add rolling features (moving averages)
-for window in [3, 6, 24]:
-    df_clean[f'temp_rolling_{window}h'] = df_clean['temperature'].rolling(window=window).mean()
+# Add lag features (previous values: 1 hour ago, 3 hours ago, 24 hours ago)
+# and rolling features (moving averages over 3, 6 and 24 hours). The same
+# LagFeatures object can later build the features for new data, so training
+# and forecasting always use identical features.
+temp_features = LagFeatures(lags=[1, 3, 24], windows=[3, 6, 24],
+                            lag_name='temp_lag_{lag}h', window_name='temp_rolling_{window}h')
+df_clean = temp_features.add_to(df_clean)
 
 # Display the engineered features
 print("\nDataset with engineered features:")
@@ -166,6 +177,31 @@ train_data = train_data.dropna()
 print("\nFinal training data shape:", train_data.shape)
 print("Final testing data shape:", test_data.shape)
 
+# Step 7: The same cleaning as a streaming stage
+print("\nStep 7: Streaming preparation for larger feeds")
+
+# One month fits in memory; a year of hourly readings from thousands of
+# stations does not. HourlyPrep (hourly_prep.py) repeats steps 2-4 -
+# duplicates, interpolation, capping - on time-ordered chunks, carrying the
+# last reading of each station from chunk to chunk, and prepare_shards()
+# writes the cleaned rows straight into training and validation files.
+raw = df.reset_index()  # the raw readings, with their gaps and outliers
+chunks = (raw.iloc[i:i + 100] for i in range(0, len(raw), 100))  # e.g. pd.read_csv(..., chunksize=100)
+prep = HourlyPrep(value_columns, time_column='timestamp',
+                  limits={'temperature': (temp_min, temp_max), 'humidity': (humidity_min, humidity_max)})
+shard_folder = tempfile.mkdtemp()
+shards = prepare_shards(chunks, shard_folder, validation_start=test_start, prep=prep)
+
+streamed_train = read_shards(shards['train'])
+print(f"{prep.stats['rows_in']} rows in 100-row chunks -> {len(shards['train'])} training "
+      f"and {len(shards['validation'])} validation shards")
+print(f"Values filled: {prep.stats['imputed']}")
+print(f"Values capped: {prep.stats['capped']}")
+in_memory = df_clean.loc[:train_end, value_columns].to_numpy()
+print(f"Same training values as the in-memory cleaning: "
+      f"{np.allclose(streamed_train[value_columns].to_numpy(), in_memory, equal_nan=True)}")
+shutil.rmtree(shard_folder)
+
 # In a classroom, you would save the figures with:
 plt.savefig('data_preparation.png')
 # And interactive display:
@@ -3,6 +3,9 @@ Visualizing Weather Time Series Data
 This example demonstrates key visualization techniques for weather data.
 """
 
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -10,6 +13,10 @@ import seaborn as sns
 from datetime import datetime, timedelta
 import matplotlib.dates as mdates
 
+# rolling_stats.py lives in the W5D5 Advanced folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'W5D5', 'Advanced'))
+from rolling_stats import RollingStats
+
 # Set the style for better-looking plots
 plt.style.use('seaborn-v0_8-whitegrid')
 
@@ -167,8 +174,12 @@ print("Created seasonal pattern visualization with error ranges.")
 # 7. Detect anomalies and visualize them
 # Calculate rolling mean and standard deviation
 window = 30  # 30-day window
-rolling_mean = weather_data['temperature'].rolling(window=window).mean()
-rolling_std = weather_data['temperature'].rolling(window=window).std()
+# RollingStats keeps the window's running mean and std, so each new day can
+# be added with rolling.append(temp) instead of recomputing the whole year
+rolling = RollingStats(windows=(window,), stats=('mean', 'std'))
+rolling_values = rolling.extend(weather_data['temperature'])
+rolling_mean = rolling_values[f'mean_{window}']
+rolling_std = rolling_values[f'std_{window}']
 
 # Define anomalies as observations that are more than 2 standard deviations from the mean
 anomalies = weather_data[
@@ -195,6 +206,13 @@ plt.grid(True)
 plt.tight_layout()
 print("Created anomaly detection visualization.")
 
+# When tomorrow's reading arrives, check it against the updated window
+tomorrow = weather_data['temperature'].iloc[-1] + 8
+latest = rolling.append(tomorrow)
+is_anomaly = abs(tomorrow - latest[f'mean_{window}']) > 2 * latest[f'std_{window}']
+print(f"New reading {tomorrow:.1f}°C: {window}-day mean {latest[f'mean_{window}']:.1f}°C, "
+      f"anomaly: {is_anomaly}")
+
 # 8. Interactive visualization simulation (in a real classroom, you'd use Plotly, Bokeh, or similar)
 # Here we'll simulate the concept with a technique to enhance standard Matplotlib
 